@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 import os
 import time
 
+from core.caches.SemanticResponseCache import SemanticResponseCache
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +42,9 @@ class RAGSystem:
             
             self.embedding_model = "text-embedding-ada-002"
             self.chat_model = "gpt-3.5-turbo"
+
+            # Shared by every session in this server process
+            self.response_cache = SemanticResponseCache.shared(threshold=0.95, max_entries=1000)
             
         except Exception as e:
             logger.error(f"Error during initialization: {str(e)}", exc_info=True)
@@ -59,11 +64,12 @@ class RAGSystem:
             logger.error(f"Error creating embedding: {str(e)}", exc_info=True)
             raise
 
-    def retrieve_from_pinecone(self, query: str, top_k: int = 3) -> List[Dict[str, str]]:
+    def retrieve_from_pinecone(self, query: str, top_k: int = 3, query_embedding: List[float] = None) -> List[Dict[str, str]]:
         """Retrieve relevant information from Pinecone index."""
         try:
-            logger.debug(f"Creating embedding for query: {query}")
-            query_embedding = self.create_embedding(query)
+            if query_embedding is None:
+                logger.debug(f"Creating embedding for query: {query}")
+                query_embedding = self.create_embedding(query)
             
             logger.debug("Querying Pinecone index...")
             results = self.index.query(
@@ -121,26 +127,39 @@ class RAGSystem:
         """Get a response from the LLM using the augmented prompt."""
         try:
             # First retrieve relevant sources
-            source_knowledge = self.retrieve_from_pinecone(query)
+            query_embedding = self.create_embedding(query)
+            source_knowledge = self.retrieve_from_pinecone(query, query_embedding=query_embedding)
             
             # Generate the prompt with the sources
             prompt = self.generate_augmented_prompt(query, source_knowledge)
             
-            # Get the response from OpenAI
-            response = self.openai_client.chat.completions.create(
-                model=self.chat_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert NLP teaching assistant."},
-                    {"role": "user", "content": prompt}
-                ]
+            # Get the response from OpenAI, unless a similar question over the same sources was already answered
+            response = self.response_cache.get_or_generate(
+                f"RAGSystem:{self.chat_model}",
+                query_embedding,
+                [source['id'] for source in source_knowledge],
+                lambda: self.openai_client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=[
+                        {"role": "system", "content": "You are an expert NLP teaching assistant."},
+                        {"role": "user", "content": prompt}
+                    ]
+                ).choices[0].message.content
             )
+            logger.debug(f"Response cache: {self.response_cache.stats()}")
             
-            return response.choices[0].message.content, source_knowledge
+            return response, source_knowledge
             
         except Exception as e:
             logger.error(f"Error getting response: {str(e)}")
             raise
 
+    def invalidate_response_cache(self) -> int:
+        """Drop cached responses after the Pinecone index has been re-synced."""
+        dropped = self.response_cache.invalidate()
+        logger.info(f"Dropped {dropped} cached responses")
+        return dropped
+
 def initialize_rag_system():
     """Initialize the RAG system if not already in session state."""
     if 'rag_system' not in st.session_state:
@@ -0,0 +1,223 @@
+from typing import Any, Dict, List, Optional
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class ArtifactCache:
+    '''
+    Disk-backed cache of parser and chunker outputs, keyed by a content hash of their input
+    Records are stored in SQLite as zlib-compressed JSON, with least-recently-used eviction beyond max_bytes
+    Records must be JSON-native; anything else is rejected rather than stringified
+    '''
+
+    # Other processes (pool workers) write to the same database, so the running total is re-read this often
+    SYNC_EVERY_PUTS = 256
+
+    def __init__(self, path: str, max_bytes: int = 2 * 1024 ** 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        # Pool workers share the database, so wait on their writes instead of failing
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "key TEXT PRIMARY KEY, "
+            "namespace TEXT NOT NULL, "
+            "records BLOB NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created REAL NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS artifacts_last_access ON artifacts (last_access)")
+        self.connection.commit()
+        # Running byte total, so a put does not have to sum the whole table
+        self.total_bytes = self._sum_bytes()
+        self.puts_since_sync = 0
+
+    def _sum_bytes(self) -> int:
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+
+    @staticmethod
+    def namespace(component: Any) -> str:
+        '''
+        Take a parser or chunker
+        Return its class name, a hash of its source file and a hash of the config that affects its output
+        '''
+        cls = type(component)
+        try:
+            with open(inspect.getsourcefile(cls), "rb") as f:
+                source_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+        except (OSError, TypeError):
+            source_hash = "unknown"
+        execution_keys = getattr(component, "execution_config_keys", ())
+        config = {
+            key: value for key, value in component.config.items()
+            if not key.startswith("cache_") and key not in execution_keys
+        }
+        config_hash = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        return f"{cls.__name__}:{source_hash}:{config_hash}"
+
+    @staticmethod
+    def file_key(namespace: str, file_path: str) -> str:
+        # The path is part of the key because parsed records carry their file name
+        digest = hashlib.sha256(f"{namespace}\0{file_path}\0".encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def records_key(namespace: str, records: List[Dict]) -> str:
+        payload = json.dumps(records, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(f"{namespace}\0{payload}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        '''
+        Take a key
+        Return the cached records, or None when they are not cached
+        '''
+        with self.lock:
+            row = self.connection.execute("SELECT records FROM artifacts WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.connection.execute("UPDATE artifacts SET last_access = ? WHERE key = ?", (time.time(), key))
+                self.connection.commit()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, namespace: str, records: List[Dict]) -> None:
+        '''
+        Take a key, its namespace and records
+        Store them, evicting the least recently used artifacts when over max_bytes
+        '''
+        try:
+            payload = json.dumps(records, ensure_ascii=False)
+        except TypeError as e:
+            # Stringifying would hand back different types on a cache hit than on a fresh run
+            raise TypeError(f"Artifact records must be JSON-native to be cached: {e}") from e
+        blob = zlib.compress(payload.encode("utf-8"), 6)
+        now = time.time()
+        with self.lock:
+            previous = self.connection.execute("SELECT size FROM artifacts WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO artifacts (key, namespace, records, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, blob, len(blob), now, now)
+            )
+            self.connection.commit()
+            self.total_bytes += len(blob) - (previous[0] if previous is not None else 0)
+            self.puts_since_sync += 1
+            if self.puts_since_sync >= self.SYNC_EVERY_PUTS:
+                self.total_bytes = self._sum_bytes()
+                self.puts_since_sync = 0
+            over_bound = self.total_bytes > self.max_bytes
+        if over_bound:
+            self.prune(self.max_bytes)
+
+    def prune(self, max_bytes: Optional[int] = None, older_than: Optional[float] = None) -> int:
+        '''
+        Take an optional size bound in bytes and an optional age in seconds
+        Evict least recently used artifacts until under the bound, and artifacts not used for longer than the age
+        Return the number of evicted artifacts
+        '''
+        evicted = 0
+        with self.lock:
+            if older_than is not None:
+                evicted += self.connection.execute(
+                    "DELETE FROM artifacts WHERE last_access < ?", (time.time() - older_than,)
+                ).rowcount
+            if max_bytes is not None:
+                total = self._sum_bytes()
+                if total > max_bytes:
+                    # Walk from the oldest artifact, collecting keys until enough bytes are freed
+                    excess = total - max_bytes
+                    keys = []
+                    for key, size in self.connection.execute("SELECT key, size FROM artifacts ORDER BY last_access"):
+                        keys.append(key)
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    for i in range(0, len(keys), 500):
+                        batch = keys[i:i + 500]
+                        self.connection.execute(f"DELETE FROM artifacts WHERE key IN ({','.join('?' * len(batch))})", batch)
+                    evicted += len(keys)
+            self.connection.commit()
+            self.total_bytes = self._sum_bytes()
+            self.puts_since_sync = 0
+        self.evictions += evicted
+        return evicted
+
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM artifacts")
+            self.connection.commit()
+            self.connection.execute("VACUUM")
+            self.total_bytes = 0
+            self.puts_since_sync = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            size, total = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            namespaces = self.connection.execute(
+                "SELECT namespace, COUNT(*), SUM(size) FROM artifacts GROUP BY namespace ORDER BY namespace"
+            ).fetchall()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": size,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "namespaces": {namespace: {"size": count, "bytes": nbytes} for namespace, count, nbytes in namespaces},
+        }
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+
+if __name__ == "__main__":
+    # python -m core.caches.ArtifactCache info data/output/cache/artifacts.sqlite
+    # python -m core.caches.ArtifactCache prune data/output/cache/artifacts.sqlite --max-mb 500 --older-than-days 30
+    arg_parser = argparse.ArgumentParser(description="Inspect and prune the parser/chunker artifact cache")
+    arg_parser.add_argument("command", choices=["info", "prune", "clear"])
+    arg_parser.add_argument("path", type=str)
+    arg_parser.add_argument("--max-mb", type=float, default=None)
+    arg_parser.add_argument("--older-than-days", type=float, default=None)
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.path):
+        arg_parser.error(f"No artifact cache at {args.path}")
+    cache = ArtifactCache(args.path)
+    if args.command == "prune":
+        evicted = cache.prune(
+            max_bytes=int(args.max_mb * 1024 ** 2) if args.max_mb is not None else None,
+            older_than=args.older_than_days * 86400 if args.older_than_days is not None else None
+        )
+        print(f"Evicted {evicted} artifact(s)")
+    elif args.command == "clear":
+        cache.clear()
+        print("Cleared artifact cache")
+
+    stats = cache.stats()
+    print(f"{stats['size']} artifact(s), {stats['bytes'] / 1024 ** 2:.2f} MiB")
+    for namespace, entry in stats["namespaces"].items():
+        print(f"  {namespace}: {entry['size']} artifact(s), {entry['bytes'] / 1024 ** 2:.2f} MiB")
+    cache.close()
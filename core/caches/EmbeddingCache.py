@@ -0,0 +1,115 @@
+from array import array
+from typing import List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class EmbeddingCache:
+    '''
+    Disk-backed embedding cache keyed by (embedding model, SHA-256 of text)
+    Stored in SQLite as float32 blobs, with least-recently-used eviction beyond max_entries
+    '''
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, "
+            "text_hash TEXT NOT NULL, "
+            "vector BLOB NOT NULL, "
+            "last_access REAL NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+        self.connection.commit()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        '''
+        Take a model name and a list of texts
+        Return cached embeddings in the same order, None where the text is not cached
+        '''
+        hashes = [self.hash_text(text) for text in texts]
+        found = {}
+        with self.lock:
+            # Stay well below SQLite's bound parameter limit
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = self.connection.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = array("f", vector).tolist()
+
+            if found:
+                now = time.time()
+                self.connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, text_hash) for text_hash in found]
+                )
+                self.connection.commit()
+
+            results = [found.get(text_hash) for text_hash in hashes]
+            # Counted under the lock, as pipeline threads share one cache
+            num_hits = sum(result is not None for result in results)
+            self.hits += num_hits
+            self.misses += len(results) - num_hits
+        return results
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        '''
+        Take a model name, texts and their embeddings
+        Store them, evicting the least recently used entries when over max_entries
+        '''
+        now = time.time()
+        rows = [
+            (model, self.hash_text(text), array("f", embedding).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            size = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if size > self.max_entries:
+                excess = size - self.max_entries
+                self.connection.execute(
+                    "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+            self.connection.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            size = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": size,
+                "max_entries": self.max_entries,
+            }
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
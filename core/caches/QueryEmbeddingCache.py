@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import time
+import unicodedata
+
+from core.caches.EmbeddingCache import EmbeddingCache
+
+
+class QueryEmbeddingCache:
+    '''
+    In-memory LRU cache of query embeddings with a time-to-live, keyed by (embedding model, normalized query)
+    An optional EmbeddingCache at persistent_path is a second tier that survives restarts; shared() returns one instance per configuration for the whole process
+    '''
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600, persistent_path: Optional[str] = None, persistent_max_entries: int = 200000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.persistent = EmbeddingCache(persistent_path, max_entries=persistent_max_entries) if persistent_path else None
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.embed_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    @classmethod
+    def shared(cls, max_entries: int = 10000, ttl_seconds: float = 3600, persistent_path: Optional[str] = None, persistent_max_entries: int = 200000) -> "QueryEmbeddingCache":
+        '''
+        Take a cache configuration
+        Return the process-wide cache with that configuration, creating it on first use
+        '''
+        key = (max_entries, ttl_seconds, persistent_path, persistent_max_entries)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(max_entries, ttl_seconds, persistent_path, persistent_max_entries)
+            return cls._instances[key]
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        # Case, Unicode form and whitespace differences do not change what a course question asks
+        return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+    def _mean_embed_seconds(self) -> float:
+        return self.embed_seconds / self.misses if self.misses else 0.0
+
+    def _get_memory(self, key: Tuple[str, str], now: float) -> Optional[List[float]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        embedding, created, latency = entry
+        if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        self.memory_hits += 1
+        self.saved_seconds += latency
+        return embedding
+
+    def _put_memory(self, key: Tuple[str, str], embedding: List[float], latency: float, now: float) -> None:
+        self.entries[key] = (embedding, now, latency)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_embed(self, model: str, queries: List[str], embed: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        '''
+        Take a model name, a list of queries and a function embedding a list of texts
+        Return the query embeddings in order, calling embed once for the distinct queries found in neither tier
+        '''
+        keys = [(model, self.normalize(query)) for query in queries]
+        found = {}
+        now = time.time()
+        with self.lock:
+            for key in keys:
+                if key not in found:
+                    embedding = self._get_memory(key, now)
+                    if embedding is not None:
+                        found[key] = embedding
+
+        # First raw query seen for each missing normalized key
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key not in found and key not in missing:
+                missing[key] = query
+
+        if missing and self.persistent is not None:
+            start = time.perf_counter()
+            persisted = self.persistent.get_many(model, [text for _, text in missing])
+            lookup = (time.perf_counter() - start) / len(missing)
+            with self.lock:
+                for key, embedding in zip(list(missing), persisted):
+                    if embedding is None:
+                        continue
+                    # The embed latency of a persisted query is unknown, so credit the running mean
+                    latency = self._mean_embed_seconds()
+                    self.persistent_hits += 1
+                    self.saved_seconds += max(latency - lookup, 0.0)
+                    self._put_memory(key, embedding, latency, now)
+                    found[key] = embedding
+                    del missing[key]
+
+        if missing:
+            start = time.perf_counter()
+            embeddings = embed(list(missing.values()))
+            elapsed = time.perf_counter() - start
+            latency = elapsed / len(missing)
+            with self.lock:
+                self.misses += len(missing)
+                self.embed_seconds += elapsed
+                for key, embedding in zip(missing, embeddings):
+                    self._put_memory(key, embedding, latency, now)
+                    found[key] = embedding
+            if self.persistent is not None:
+                self.persistent.put_many(model, [text for _, text in missing], embeddings)
+
+        return [found[key] for key in keys]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            hits = self.memory_hits + self.persistent_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "mean_embed_seconds": self._mean_embed_seconds(),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self.entries),
+                "max_entries": self.max_entries,
+            }
+
+    def close(self) -> None:
+        if self.persistent is not None:
+            self.persistent.close()
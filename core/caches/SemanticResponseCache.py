@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import itertools
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticResponseCache:
+    '''
+    In-memory cache of generated answers keyed by the retrieved chunk ids and matched on query embedding similarity
+    A cached answer is returned when a query retrieves exactly the same chunks and its embedding is within threshold cosine similarity of the cached query
+    Bounded by max_entries with least-recently-used eviction; invalidate() drops entries once the index they were retrieved from changes
+    '''
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, ttl_seconds: Optional[float] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # entry id -> (context key, unit query embedding, answer, created, generation latency)
+        self.entries = OrderedDict()
+        # context key -> entry ids, so a lookup only compares queries that retrieved the same chunks
+        self.by_context = {}
+        self.next_id = itertools.count()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @classmethod
+    def shared(cls, threshold: float = 0.95, max_entries: int = 1000, ttl_seconds: Optional[float] = None) -> "SemanticResponseCache":
+        '''
+        Take a cache configuration
+        Return the process-wide cache with that configuration, creating it on first use
+        '''
+        key = (threshold, max_entries, ttl_seconds)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(threshold, max_entries, ttl_seconds)
+            return cls._instances[key]
+
+    @staticmethod
+    def _unit(query_embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _remove(self, entry_id: int) -> None:
+        context_key = self.entries.pop(entry_id)[0]
+        ids = self.by_context[context_key]
+        ids.discard(entry_id)
+        if not ids:
+            del self.by_context[context_key]
+
+    def lookup(self, namespace: str, query_embedding: List[float], chunk_ids: List[str]) -> Optional[str]:
+        '''
+        Take a generator namespace, a query embedding and the ids of the retrieved chunks in order
+        Return the cached answer of the most similar query with the same chunks, or None below threshold
+        '''
+        context_key = (namespace, tuple(chunk_ids))
+        query = self._unit(query_embedding)
+        now = time.time()
+        with self.lock:
+            best_id, best_similarity = None, self.threshold
+            for entry_id in list(self.by_context.get(context_key, ())):
+                _, embedding, _, created, _ = self.entries[entry_id]
+                if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+                    self._remove(entry_id)
+                    self.evictions += 1
+                    continue
+                similarity = float(embedding @ query) if embedding.shape == query.shape else -1.0
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(best_id)
+            _, _, answer, _, latency = self.entries[best_id]
+            self.hits += 1
+            self.saved_seconds += latency
+            return answer
+
+    def store(self, namespace: str, query_embedding: List[float], chunk_ids: List[str], answer: str, latency: float = 0.0) -> None:
+        '''
+        Take a generator namespace, a query embedding, the retrieved chunk ids, the generated answer and how long it took
+        Cache the answer, evicting the least recently used entries beyond max_entries
+        '''
+        context_key = (namespace, tuple(chunk_ids))
+        query = self._unit(query_embedding)
+        with self.lock:
+            entry_id = next(self.next_id)
+            self.entries[entry_id] = (context_key, query, answer, time.time(), latency)
+            self.by_context.setdefault(context_key, set()).add(entry_id)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def get_or_generate(self, namespace: str, query_embedding: List[float], chunk_ids: List[str], generate: Callable[[], str]) -> str:
+        '''
+        Take a generator namespace, a query embedding, the retrieved chunk ids and a function producing the answer
+        Return the cached answer, or generate, cache and return a new one
+        '''
+        answer = self.lookup(namespace, query_embedding, chunk_ids)
+        if answer is None:
+            start = time.perf_counter()
+            answer = generate()
+            self.store(namespace, query_embedding, chunk_ids, answer, time.perf_counter() - start)
+        return answer
+
+    def invalidate(self) -> int:
+        '''
+        Drop every cached answer, for when the index has been re-synced
+        Return the number of entries dropped
+        '''
+        with self.lock:
+            dropped = len(self.entries)
+            self.entries.clear()
+            self.by_context.clear()
+            self.invalidations += 1
+            return dropped
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self.entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+            }
@@ -0,0 +1,179 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+
+
+class IngestionCheckpoint:
+    '''
+    Durable progress log for an ingestion run, so an interrupted run resumes where it stopped
+    Embedded chunks are appended to chunks.jsonl as soon as they are produced, and a file is recorded in
+    manifest.jsonl, with its content hash, chunk hashes and the duplicates dropped from it, once all of its chunks are in the log
+    '''
+
+    def __init__(self, directory: str, model: Optional[str] = None):
+        self.directory = directory
+        self.chunks_path = os.path.join(directory, "chunks.jsonl")
+        self.manifest_path = os.path.join(directory, "manifest.jsonl")
+        self.info_path = os.path.join(directory, "checkpoint.json")
+        os.makedirs(directory, exist_ok=True)
+
+        # Embeddings from another model cannot be mixed into this run
+        if model is not None and os.path.exists(self.info_path):
+            with open(self.info_path, "r", encoding="utf-8") as f:
+                previous_model = json.load(f).get("model")
+            if previous_model != model:
+                print(f"Checkpoint at {directory} was written with {previous_model}, discarding it")
+                self.clear()
+                os.makedirs(directory, exist_ok=True)
+        with open(self.info_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model}, f)
+
+        self.completed = {}
+        for _, entry in self._read_log(self.manifest_path):
+            self.completed[entry["file_name"]] = entry
+        # Only byte offsets are kept in memory, chunks are read back from the log on demand
+        self.offsets = {}
+        for offset, entry in self._read_log(self.chunks_path):
+            self.offsets[entry["hash"]] = offset
+        self._chunks_reader = None
+
+        if self.completed or self.offsets:
+            print(f"Resuming from checkpoint: {len(self.completed)} completed file(s), {len(self.offsets)} embedded chunk(s)")
+
+    @staticmethod
+    def _read_log(path: str) -> Iterator[Tuple[int, Dict]]:
+        '''
+        Take a JSONL log path
+        Yield (byte offset, record) for every complete record, truncating a torn final line left by a crash
+        '''
+        if not os.path.exists(path):
+            return
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                yield offset, record
+                offset += len(line)
+        if offset < os.path.getsize(path):
+            os.truncate(path, offset)
+
+    @staticmethod
+    def _append_log(path: str, records: Iterable[Dict]) -> List[int]:
+        '''
+        Take a JSONL log path and records
+        Append them durably and return the byte offset of each record
+        '''
+        offsets = []
+        with open(path, "ab") as f:
+            offset = f.tell()
+            for record in records:
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                offsets.append(offset)
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        return offsets
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_hash(item: Dict) -> str:
+        # Hash everything but the embedding, so a chunk is recognised before it has been embedded,
+        # and its duplicate locations, which grow as later files are deduplicated
+        content = {key: value for key, value in item.items() if key not in ("embedding", "duplicates")}
+        return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+    def is_complete(self, file_path: str) -> bool:
+        '''
+        Take a file path
+        Return whether it was fully embedded and has not changed since
+        '''
+        entry = self.completed.get(file_path)
+        return entry is not None and entry["file_hash"] == self.file_hash(file_path)
+
+    def has_chunk(self, chunk_hash: str) -> bool:
+        return chunk_hash in self.offsets
+
+    def get_chunk(self, chunk_hash: str) -> Dict:
+        if self._chunks_reader is None:
+            self._chunks_reader = open(self.chunks_path, "rb")
+        self._chunks_reader.seek(self.offsets[chunk_hash])
+        return json.loads(self._chunks_reader.readline())["chunk"]
+
+    def append_chunks(self, items: List[Dict], hashes: Optional[List[str]] = None):
+        '''
+        Take embedded chunks, and optionally their precomputed hashes
+        Append them to the chunk log
+        '''
+        if not items:
+            return
+        if hashes is None:
+            hashes = [self.chunk_hash(item) for item in items]
+        records = []
+        for item, chunk_hash in zip(items, hashes):
+            chunk = dict(item)
+            if hasattr(chunk["embedding"], "tolist"):
+                chunk["embedding"] = chunk["embedding"].tolist()
+            records.append({"hash": chunk_hash, "chunk": chunk})
+        for chunk_hash, offset in zip(hashes, self._append_log(self.chunks_path, records)):
+            self.offsets[chunk_hash] = offset
+
+    def complete_file(self, file_path: str, chunk_hashes: List[str], duplicates: Optional[List[Dict]] = None):
+        '''
+        Take a file path, the hashes of its chunks, all of which must already be in the chunk log,
+        and the deduplicator links of the chunks dropped from it
+        Record the file as done
+        '''
+        entry = {"file_name": file_path, "file_hash": self.file_hash(file_path), "chunk_hashes": chunk_hashes}
+        # Stored with the file, so duplicates are only counted once the file is done and never twice after a resume
+        if duplicates:
+            entry["duplicates"] = duplicates
+        self._append_log(self.manifest_path, [entry])
+        self.completed[file_path] = entry
+
+    def iter_chunks(self, file_names: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        '''
+        Take an optional file order (defaults to completion order)
+        Yield the embedded chunks of every completed file
+        '''
+        for file_name in (self.completed if file_names is None else file_names):
+            entry = self.completed.get(file_name)
+            if entry is None:
+                continue
+            for chunk_hash in entry["chunk_hashes"]:
+                yield self.get_chunk(chunk_hash)
+
+    def iter_duplicates(self) -> Iterator[Dict]:
+        '''
+        Yield the deduplicator links recorded for every completed file, in completion order
+        '''
+        for entry in self.completed.values():
+            yield from entry.get("duplicates", [])
+
+    def close(self):
+        if self._chunks_reader is not None:
+            self._chunks_reader.close()
+            self._chunks_reader = None
+
+    def clear(self):
+        '''
+        Delete the checkpoint once its results have been saved elsewhere
+        '''
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.completed = {}
+        self.offsets = {}
@@ -1,16 +1,43 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict
+import multiprocessing
+
+from core.caches.ArtifactCache import ArtifactCache
+from core.records.RecordBatch import RecordBatch
+
+# Per-process chunker, built once by the pool initializer so each worker loads its tokenizer a single time
+_worker_chunker = None
+
+def _init_worker(chunker_class, config: Dict):
+    global _worker_chunker
+    _worker_chunker = chunker_class(**config)
+
+def _chunk_in_worker(data: List[Dict]) -> List[Dict]:
+    return _worker_chunker._chunk_serial(data)
 
 class BaseChunker(ABC):
     '''
     Abstract base class for chunkers
     '''
-    
+
+    # Config keys that change how chunking runs but not its output
+    execution_config_keys = ("num_workers", "parallel_threshold", "mp_context")
+
     def __init__(self, **kwargs):
         '''
         Initialize a chunker with optional configuration parameters
+        An artifact cache is attached when cache_path is configured
         '''
         self.config = kwargs
+        self.cache = None
+        if self.config.get("cache_path"):
+            self.cache = ArtifactCache(self.config["cache_path"], max_bytes=self.config.get("cache_max_bytes", 2 * 1024 ** 3))
+            self.cache_namespace = ArtifactCache.namespace(self)
+        self.num_workers = self.config.get("num_workers", 1)
+        self.parallel_threshold = self.config.get("parallel_threshold", 512)
+        self.mp_context = self.config.get("mp_context", "spawn")
+        self._pool = None
 
     @abstractmethod
     def chunk(self, data: List[Dict]) -> List[Dict]:
@@ -18,4 +45,67 @@ class BaseChunker(ABC):
         Take a list of dictionaries structured text and metadata
         Return a list of dictionaries of chunks of structured text and metadata
         '''
-        pass
\ No newline at end of file
+        pass
+
+    def chunk_columnar(self, batch: RecordBatch) -> RecordBatch:
+        '''
+        Take a columnar batch of structured text and metadata
+        Return a columnar batch of chunks
+        '''
+        return RecordBatch.from_records(self.chunk(batch.to_records()))
+
+    @abstractmethod
+    def _chunk_serial(self, data: List[Dict]) -> List[Dict]:
+        '''
+        Take a list of dictionaries structured text and metadata
+        Return their chunks, computed in this process
+        '''
+        pass
+
+    def _chunk_parallel(self, data: List[Dict]) -> List[Dict]:
+        '''
+        Take a list of dictionaries structured text and metadata
+        Return their chunks in order, fanning contiguous slices out to a process pool once the input is large enough
+        '''
+        if self.num_workers <= 1 or len(data) < self.parallel_threshold:
+            return self._chunk_serial(data)
+
+        if self._pool is None:
+            # Workers chunk serially and skip the cache, which stays with this process
+            worker_config = {key: value for key, value in self.config.items() if not key.startswith("cache_")}
+            worker_config["num_workers"] = 1
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context(self.mp_context),
+                initializer=_init_worker,
+                initargs=(type(self), worker_config)
+            )
+        # A few slices per worker evens out entries of very different lengths
+        slice_size = -(-len(data) // (4 * self.num_workers))
+        slices = [data[i:i + slice_size] for i in range(0, len(data), slice_size)]
+        chunks = []
+        for result in self._pool.map(_chunk_in_worker, slices):
+            chunks.extend(result)
+        return chunks
+
+    def close(self):
+        '''
+        Shut down the chunking process pool, if one was started
+        '''
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def cached_chunk(self, data: List[Dict]) -> List[Dict]:
+        '''
+        Take a list of dictionaries structured text and metadata
+        Return their chunks, reusing the cached ones when the same records were chunked before
+        '''
+        if self.cache is None:
+            return self.chunk(data)
+        key = ArtifactCache.records_key(self.cache_namespace, data)
+        chunks = self.cache.get(key)
+        if chunks is None:
+            chunks = self.chunk(data)
+            self.cache.put(key, self.cache_namespace, chunks)
+        return chunks
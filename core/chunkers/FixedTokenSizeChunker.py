@@ -1,59 +1,120 @@
+import numpy as np
 import tiktoken
 from core.chunkers.BaseChunker import BaseChunker
+from core.records.RecordBatch import RecordBatch
 
 class FixedTokenSizeChunker(BaseChunker):
+    '''
+    Chunker producing windows of at most max_tokens model tokens, with overlap tokens shared between neighbours
+    Each entry is tokenized once and chunk text is sliced from the original text by byte offsets,
+    then trimmed where re-encoding the slice would exceed max_tokens
+    '''
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.config = kwargs
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        self.max_tokens = self.config.get("max_tokens", 512)
+        self.overlap = self.config.get("overlap", 50)
+        if not 0 <= self.overlap < self.max_tokens:
+            raise ValueError(f"overlap ({self.overlap}) must be smaller than max_tokens ({self.max_tokens})")
+        self.tokenizer = tiktoken.get_encoding(self.config.get("encoding", "cl100k_base"))
+        self._token_lengths = None
+
+    @property
+    def token_lengths(self) -> np.ndarray:
+        # Byte length of every token id, so offsets come from one cumsum instead of decoding tokens
+        if self._token_lengths is None:
+            lengths = np.zeros(self.tokenizer.n_vocab, dtype=np.int64)
+            for token in range(self.tokenizer.n_vocab):
+                try:
+                    lengths[token] = len(self.tokenizer.decode_single_token_bytes(token))
+                except KeyError:
+                    pass
+            self._token_lengths = lengths
+        return self._token_lengths
+
+    @staticmethod
+    def _char_boundary(text_bytes: bytes, offset: int) -> int:
+        # A character split across tokens is kept whole by the window holding its first byte
+        # and skipped by a window starting mid-character, so slices always decode cleanly
+        while 0 < offset < len(text_bytes) and text_bytes[offset] & 0xC0 == 0x80:
+            offset += 1
+        return offset
+
+    def _window_texts(self, text, tokens):
+        '''
+        Take a text and its tokens
+        Return the text of every window of at most max_tokens tokens
+        '''
+        if not tokens:
+            return []
+        text_bytes = text.encode("utf-8")
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(self.token_lengths[tokens], out=offsets[1:])
+        # Text that does not round-trip through UTF-8 (e.g. lone surrogates) falls back to decoding tokens
+        sliceable = offsets[-1] == len(text_bytes)
+
+        def window_text(start, end):
+            if sliceable:
+                return text_bytes[self._char_boundary(text_bytes, offsets[start]):self._char_boundary(text_bytes, offsets[end])].decode("utf-8")
+            return self.tokenizer.decode(tokens[start:end])
+
+        texts = []
+        step = self.max_tokens - self.overlap
+        start = 0
+        while True:
+            end = min(start + self.max_tokens, len(tokens))
+            chunk_text = window_text(start, end)
+            # Re-tokenizing a slice can merge differently at its edges, so trim until the text itself fits max_tokens;
+            # a window holding the whole entry is its original text and re-encodes to the same tokens
+            while (start > 0 or end < len(tokens)) and end - start > 1 and len(self.tokenizer.encode_ordinary(chunk_text)) > self.max_tokens:
+                end -= 1
+                chunk_text = window_text(start, end)
+            texts.append(chunk_text)
+            if end == len(tokens):
+                return texts
+            # A trimmed window moves the next one back so no token is skipped
+            start = max(start + 1, min(start + step, end - self.overlap))
+
+    @staticmethod
+    def _first_10_tokens(chunk_text):
+        return " ".join(chunk_text.split(maxsplit=10)[:10])
+
+    def _chunk_entry(self, entry, tokens):
+        return [
+            {
+                **entry,  # Copy the original dictionary fields
+                'text': chunk_text,
+                'sub_marker': sub_marker,
+                'first_10_tokens': self._first_10_tokens(chunk_text)
+            } for sub_marker, chunk_text in enumerate(self._window_texts(entry['text'], tokens))
+        ]
 
     def chunk(self, data):
-        max_tokens = self.config.get("max_tokens", 512)
-        overlap = self.config.get("overlap", 50)
+        self.chunks = self._chunk_parallel(data)
+        return self.chunks
+
+    def _chunk_serial(self, data):
+        # Entries without any tokens would only produce empty chunks, which the embedding API rejects
+        all_tokens = self.tokenizer.encode_ordinary_batch([entry['text'] for entry in data])
 
         chunked_data = []
-    
-        for entry in data:
-            text = entry['text'].split("\n")  # Split text into sentences/lines
-            chunks = []
-            chunk = []
-            current_tokens = 0
-            sub_marker = 0
-            
-            for idx, sentence in enumerate(text):
-                sentence_tokens = len(sentence.split())  # Approximation of token count
-                if current_tokens + sentence_tokens > max_tokens:
-                    # Finalize current chunk
-                    chunk_text = " ".join(chunk)
-                    chunks.append({
-                        **entry,  # Copy the original dictionary fields
-                        'text': chunk_text,
-                        'sub_marker': sub_marker,
-                        'first_10_tokens': " ".join(chunk_text.split()[:10])
-                    })
-                    sub_marker += 1
-                    
-                    # Start a new chunk with overlap
-                    overlap_sentences = chunk[-overlap:] if overlap < len(chunk) else chunk
-                    chunk = overlap_sentences[:]
-                    current_tokens = sum(len(s.split()) for s in overlap_sentences)
-                
-                # Add the current sentence to the chunk
-                chunk.append(sentence)
-                current_tokens += sentence_tokens
-            
-            # Add the last chunk
-            if chunk:
-                chunk_text = " ".join(chunk)
-                chunks.append({
-                    **entry,
-                    'text': chunk_text,
-                    'sub_marker': sub_marker,
-                    'first_10_tokens': " ".join(chunk_text.split()[:10])
-                })
-            
-            # Append all chunks for this entry to the result
-            chunked_data.extend(chunks)
-
-        self.chunks = chunked_data
-        return self.chunks
\ No newline at end of file
+        for entry, tokens in zip(data, all_tokens):
+            chunked_data.extend(self._chunk_entry(entry, tokens))
+
+        return chunked_data
+
+    def chunk_columnar(self, batch: RecordBatch) -> RecordBatch:
+        # Parent columns are gathered by row index instead of copying every parent dict into its chunks
+        all_tokens = self.tokenizer.encode_ordinary_batch(batch["text"])
+        parents, texts, sub_markers = [], [], []
+        for row, (text, tokens) in enumerate(zip(batch["text"], all_tokens)):
+            windows = self._window_texts(text, tokens)
+            parents.extend([row] * len(windows))
+            sub_markers.extend(range(len(windows)))
+            texts.extend(windows)
+        return batch.take(parents).with_columns(
+            text=texts,
+            sub_marker=np.asarray(sub_markers, dtype=np.int64),
+            first_10_tokens=[self._first_10_tokens(text) for text in texts]
+        )
@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class BaseDeduplicator(ABC):
+    '''
+    Abstract base class for chunk deduplicators, run between the chunker and the embedder
+    '''
+
+    def __init__(self, **kwargs):
+        '''
+        Initialize a deduplicator with optional configuration parameters
+        '''
+        self.config = kwargs
+
+    @abstractmethod
+    def deduplicate_with_links(self, data: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        '''
+        Take a list of chunks
+        Return the chunks not already seen in this or earlier calls, each carrying the locations of its duplicates,
+        and one link per dropped chunk with the location of the kept chunk, the duplicate's location, its kind and length
+        '''
+        pass
+
+    def deduplicate(self, data: List[Dict]) -> List[Dict]:
+        '''
+        Take a list of chunks
+        Return the chunks not already seen in this or earlier calls, each carrying the locations of its duplicates
+        '''
+        return self.deduplicate_with_links(data)[0]
+
+    @abstractmethod
+    def register(self, data: List[Dict], links: Iterable[Dict] = ()) -> None:
+        '''
+        Take a list of chunks that were kept by an earlier run, and the links of the duplicates it dropped
+        Index the chunks so later duplicates of them are dropped, and restore their provenance and counts from the links
+        '''
+        pass
+
+    @abstractmethod
+    def duplicates_of(self, item: Dict) -> Optional[List[Dict]]:
+        '''
+        Take a kept chunk, or a copy of it read back from disk
+        Return the locations of all of its duplicates seen so far, or None if it is not a kept chunk
+        '''
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        '''
+        Return counts of kept and dropped chunks and the embeddings saved
+        '''
+        pass
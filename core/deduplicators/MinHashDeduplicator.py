@@ -0,0 +1,143 @@
+from core.deduplicators.BaseDeduplicator import BaseDeduplicator
+import numpy as np
+import hashlib
+import re
+import zlib
+
+# Smallest prime above 2**32, so every 32-bit shingle hash is a distinct residue
+_PRIME = np.uint64(4294967311)
+# a and b are drawn below 2**32: with x < 2**32, a * x + b <= (2**32 - 1) * 2**32 < 2**64, so uint64 never wraps before the mod
+_COEFFICIENT_BOUND = np.uint64(2 ** 32)
+
+class MinHashDeduplicator(BaseDeduplicator):
+    '''
+    Drops exact duplicates by hashing normalized text, and near duplicates with MinHash signatures over word shingles
+    Candidate pairs come from LSH banding and are kept apart only if their estimated Jaccard similarity is below threshold
+    The first occurrence of a chunk is kept and records every other location in its "duplicates" field
+    '''
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.num_perm = self.config.get("num_perm", 128)
+        self.bands = self.config.get("bands", 32)
+        if self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be divisible by bands ({self.bands})")
+        self.rows = self.num_perm // self.bands
+        self.threshold = self.config.get("threshold", 0.85)
+        self.shingle_size = self.config.get("shingle_size", 5)
+        rng = np.random.default_rng(self.config.get("seed", 0))
+        self.a = rng.integers(1, _COEFFICIENT_BOUND, size=self.num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _COEFFICIENT_BOUND, size=self.num_perm, dtype=np.uint64)
+
+        # Only each kept chunk's provenance list is held on to, not the chunk itself
+        self.provenance = []
+        self.locations = []
+        self.index_by_location = {}
+        self.signatures = []
+        self.exact_index = {}
+        self.buckets = {}
+        self.counts = {"seen": 0, "kept": 0, "exact_duplicates": 0, "near_duplicates": 0, "saved_characters": 0}
+
+    @staticmethod
+    def _normalize(text):
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def _signature(self, normalized):
+        words = normalized.split(" ")
+        size = min(self.shingle_size, len(words))
+        hashes = np.fromiter(
+            {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)},
+            dtype=np.uint64
+        )
+        # One row per permutation, minimum over shingles
+        return (((hashes[None, :] * self.a[:, None]) + self.b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    @staticmethod
+    def _location(item):
+        return {"file_name": item.get("file_name"), "marker": item.get("marker"), "sub_marker": item.get("sub_marker")}
+
+    @staticmethod
+    def _location_key(item):
+        return (item.get("file_name"), str(item.get("marker")), str(item.get("sub_marker")))
+
+    def _find_near(self, signature):
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        for index in sorted(candidates):
+            if np.mean(self.signatures[index] == signature) >= self.threshold:
+                return index
+        return None
+
+    def _keep(self, item, exact_key, signature):
+        index = len(self.provenance)
+        self.provenance.append(item.setdefault("duplicates", []))
+        self.locations.append(self._location(item))
+        self.index_by_location[self._location_key(item)] = index
+        self.signatures.append(signature)
+        self.exact_index[exact_key] = index
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(index)
+
+    def deduplicate_with_links(self, data):
+        unique = []
+        links = []
+        for item in data:
+            self.counts["seen"] += 1
+            normalized = self._normalize(item['text'])
+            exact_key = hashlib.sha1(normalized.encode("utf-8")).digest()
+            # Exact copies are caught by the hash alone, without computing a signature
+            index = self.exact_index.get(exact_key)
+            kind = "exact"
+            if index is None:
+                signature = self._signature(normalized)
+                index = self._find_near(signature)
+                if index is None:
+                    self._keep(item, exact_key, signature)
+                    unique.append(item)
+                    self.counts["kept"] += 1
+                    continue
+                kind = "near"
+            link = {"kept": self.locations[index], "duplicate": self._location(item), "kind": kind, "characters": len(item['text'])}
+            self._link(index, link)
+            links.append(link)
+        return unique, links
+
+    def _link(self, index, link):
+        self.provenance[index].append(link["duplicate"])
+        self.counts[f"{link['kind']}_duplicates"] += 1
+        self.counts["saved_characters"] += link["characters"]
+
+    def register(self, data, links=()):
+        for item in data:
+            normalized = self._normalize(item['text'])
+            exact_key = hashlib.sha1(normalized.encode("utf-8")).digest()
+            if exact_key not in self.exact_index:
+                # Provenance is rebuilt from the links, not from the copy read back from disk
+                item["duplicates"] = []
+                self._keep(item, exact_key, self._signature(normalized))
+                self.counts["seen"] += 1
+                self.counts["kept"] += 1
+        for link in links:
+            self.counts["seen"] += 1
+            self._link(self.index_by_location[self._location_key(link["kept"])], link)
+
+    def duplicates_of(self, item):
+        index = self.index_by_location.get(self._location_key(item))
+        return self.provenance[index] if index is not None else None
+
+    def stats(self):
+        dropped = self.counts["exact_duplicates"] + self.counts["near_duplicates"]
+        batch_size = self.config.get("embed_batch_size")
+        stats = {
+            **self.counts,
+            "saved_embeddings": dropped,
+            "saved_fraction": dropped / self.counts["seen"] if self.counts["seen"] else 0.0,
+        }
+        if batch_size:
+            # Requests the embedder would have sent for every chunk versus for the kept ones
+            stats["saved_requests"] = -(-self.counts["seen"] // batch_size) - -(-self.counts["kept"] // batch_size)
+        return stats
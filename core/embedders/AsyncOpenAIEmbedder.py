@@ -0,0 +1,160 @@
+from core.embedders.OpenAIEmbedder import OpenAIEmbedder
+from openai import AsyncOpenAI, RateLimitError, InternalServerError, APIConnectionError
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import random
+import time
+
+
+class TokenBucket:
+    '''
+    Token bucket rate limiter refilled continuously at a per-minute rate
+    '''
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.refill_per_second = rate_per_minute / 60
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_per_second)
+        self.last_refill = now
+
+    async def acquire(self, amount: float):
+        '''
+        Wait until amount tokens are available and take them
+        Requests larger than the bucket only wait for a full bucket
+        '''
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.refill_per_second)
+                self._refill()
+            self.tokens -= amount
+
+
+class ConcurrencyWindow:
+    '''
+    Limit on requests in flight that adapts to the server: halved on a 429, grown by about one per window of successes
+    Keeps the client near the concurrency the server accepts instead of retrying into a full server
+    '''
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = float(max_size)
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            while self.in_flight >= int(self.size):
+                await self.condition.wait()
+            self.in_flight += 1
+
+    async def release(self, throttled: bool = False):
+        async with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.size = max(1.0, self.size / 2)
+            else:
+                self.size = min(float(self.max_size), self.size + 1 / self.size)
+            self.condition.notify_all()
+
+
+class AsyncOpenAIEmbedder(OpenAIEmbedder):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.max_concurrency = self.config.get("max_concurrency", 8)
+        self.requests_per_minute = self.config.get("requests_per_minute", 3000)
+        self.tokens_per_minute = self.config.get("tokens_per_minute", 1000000)
+        self.max_retries = self.config.get("max_retries", 6)
+        self.base_backoff = self.config.get("base_backoff", 1.0)
+        self.max_backoff = self.config.get("max_backoff", 60.0)
+
+    def _backoff_delay(self, attempt, error):
+        # Back off exponentially with jitter, never sooner than the server's Retry-After hint on 429s,
+        # so limited batches spread out instead of all retrying together
+        delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+        if isinstance(error, RateLimitError):
+            try:
+                delay = max(float(error.response.headers.get("retry-after")), delay)
+            except (TypeError, ValueError):
+                pass
+        return delay * (1 + random.random() / 2)
+
+    async def _embed_batch(self, client, texts, batch, num_tokens, embeddings, window, request_limiter, token_limiter):
+        for attempt in range(self.max_retries + 1):
+            await request_limiter.acquire(1)
+            await token_limiter.acquire(num_tokens)
+            await window.acquire()
+            try:
+                response = await client.embeddings.create(
+                    model=self.model,
+                    input=[texts[idx] for idx in batch]
+                )
+            except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                await window.release(throttled=isinstance(e, RateLimitError))
+                if attempt == self.max_retries:
+                    raise
+                # The slot is given back while backing off so other batches can use it
+                await asyncio.sleep(self._backoff_delay(attempt, e))
+                continue
+            except BaseException:
+                await window.release()
+                raise
+            await window.release()
+            break
+
+        # Results land in their original positions regardless of completion order
+        for result in response.data:
+            embeddings[batch[result.index]] = result.embedding
+
+    async def _embed_uncached_async(self, texts):
+        '''
+        Take a list of texts
+        Return a list of embedding vectors in the same order, keeping up to max_concurrency requests in flight
+        '''
+        embeddings = [None] * len(texts)
+        window = ConcurrencyWindow(self.max_concurrency)
+        request_limiter = TokenBucket(self.requests_per_minute)
+        token_limiter = TokenBucket(self.tokens_per_minute)
+        # Retries are handled here so that they go through the rate limiters
+        async with AsyncOpenAI(
+            api_key=self.config.get("api_key", ""),
+            base_url=self.config.get("base_url", None),
+            max_retries=0
+        ) as client:
+            tasks = [
+                asyncio.create_task(self._embed_batch(
+                    client, texts, batch, num_tokens, embeddings, window, request_limiter, token_limiter
+                ))
+                for batch, num_tokens in self._make_batches(texts)
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # A failed batch cancels the rest, which must finish before the client closes under them
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        return embeddings
+
+    def _embed_uncached(self, texts):
+        # A lone query is not worth an event loop, so it goes through the synchronous client
+        if len(texts) <= 1:
+            return super()._embed_uncached(texts)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._embed_uncached_async(texts))
+
+        # Already inside an event loop (notebooks, Streamlit), so run on a separate thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self._embed_uncached_async(texts)).result()
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List
+import numpy as np
+
+from core.caches.EmbeddingCache import EmbeddingCache
+from core.records.RecordBatch import RecordBatch
 
 class BaseEmbedder(ABC):
     '''
@@ -9,8 +13,15 @@ class BaseEmbedder(ABC):
     def __init__(self, **kwargs):
         '''
         Initialize an embedder with optional configuration parameters
+        An embedding cache is attached when cache_path is configured
         '''
         self.config = kwargs
+        self.cache = None
+        if self.config.get("cache_path"):
+            self.cache = EmbeddingCache(
+                self.config["cache_path"],
+                max_entries=self.config.get("cache_max_entries", 200000)
+            )
 
     @abstractmethod
     def embed_text(self, text: str) -> List[float]:
@@ -26,4 +37,42 @@ class BaseEmbedder(ABC):
         Take a dictionary of chunks and associated metadata
         Return chunks with embedding
         '''
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        '''
+        Take a list of text strings
+        Return their embedding vectors from the underlying model, in order
+        '''
+        pass
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        '''
+        Take a list of text strings
+        Return their embedding vectors in order, only calling the model for texts missing from the cache
+        '''
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        model = getattr(self, "model", type(self).__name__)
+        embeddings = self.cache.get_many(model, texts)
+        # Embed each distinct missing text once
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        if missing:
+            new_embeddings = dict(zip(missing, self._embed_uncached(missing)))
+            self.cache.put_many(model, missing, [new_embeddings[text] for text in missing])
+            embeddings = [
+                new_embeddings[text] if embedding is None else embedding
+                for text, embedding in zip(texts, embeddings)
+            ]
+
+        return embeddings
+
+    def embed_columnar(self, batch: RecordBatch) -> RecordBatch:
+        '''
+        Take a columnar batch of chunks
+        Return the batch with an embedding column holding one float32 matrix
+        '''
+        embeddings = self.embed_texts(batch["text"]) if len(batch) else []
+        return batch.with_columns(embedding=np.asarray(embeddings, dtype=np.float32).reshape(len(batch), -1))
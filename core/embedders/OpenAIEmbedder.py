@@ -1,5 +1,6 @@
 from core.embedders.BaseEmbedder import BaseEmbedder
 from openai import OpenAI
+import tiktoken
 
 
 class OpenAIEmbedder(BaseEmbedder):
@@ -7,22 +8,61 @@ class OpenAIEmbedder(BaseEmbedder):
         super().__init__(**kwargs)
         self.config = kwargs
         self.client = OpenAI(
-            api_key = self.config.get("api_key", "")
+            api_key = self.config.get("api_key", ""),
+            base_url = self.config.get("base_url", None)
         )
         self.model = self.config.get("embedding_model", "text-embedding-ada-002")
+        # Cap on the number of inputs and on the total tokens packed into one request
+        self.batch_size = self.config.get("batch_size", 128)
+        self.max_batch_tokens = self.config.get("max_batch_tokens", 100000)
+        try:
+            self.tokenizer = tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            self.tokenizer = tiktoken.get_encoding("cl100k_base")
+
+    def _make_batches(self, texts):
+        '''
+        Take a list of texts
+        Return a list of (indices into texts, token count) batches, each within batch_size and max_batch_tokens
+        '''
+        token_counts = [len(tokens) for tokens in self.tokenizer.encode_ordinary_batch(texts)]
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for idx, num_tokens in enumerate(token_counts):
+            if batch and (len(batch) >= self.batch_size or batch_tokens + num_tokens > self.max_batch_tokens):
+                batches.append((batch, batch_tokens))
+                batch = []
+                batch_tokens = 0
+            batch.append(idx)
+            batch_tokens += num_tokens
+        if batch:
+            batches.append((batch, batch_tokens))
+
+        return batches
+
+    def _embed_uncached(self, texts):
+        # Use as few requests as the batch limits allow
+        embeddings = [None] * len(texts)
+        for batch, _ in self._make_batches(texts):
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=[texts[idx] for idx in batch]
+            )
+            # Each result carries the position of its input within the request
+            for result in response.data:
+                embeddings[batch[result.index]] = result.embedding
+
+        return embeddings
 
     def embed_text(self, text):
-        return self.client.embeddings.create(
-                    model=self.model,
-                    input=text
-                ).data[0].embedding
+        return self.embed_texts([text])[0]
 
     def embed_data(self, data):
-        self.embeddings = []
-        for item in data:
-            item["embedding"] = self.client.embeddings.create(
-                model=self.model,
-                input=item["text"]
-            ).data[0].embedding
-            self.embeddings.append(item)
-        return self.embeddings
\ No newline at end of file
+        # A local list, since pipeline embed workers share one embedder across threads
+        embeddings = []
+        vectors = self.embed_texts([item["text"] for item in data])
+        for item, vector in zip(data, vectors):
+            item["embedding"] = vector
+            embeddings.append(item)
+        return embeddings
@@ -0,0 +1,142 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+import multiprocessing
+import os
+
+from core.embedders.BaseEmbedder import BaseEmbedder
+
+# Per-process model, loaded once by the pool initializer so each worker reads the model files a single time
+_worker_model = None
+
+def _load_model(model_path: str, device: str):
+    '''
+    Take a local model directory and a device
+    Return the SentenceTransformer loaded from local files only, never from the network
+    '''
+    if not os.path.isdir(model_path):
+        raise FileNotFoundError(
+            f"No local model at '{model_path}', download it once with "
+            f"SentenceTransformer('<model name>').save('{model_path}')"
+        )
+    # Imported here so configs without this embedder never import torch
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_path, device=device, local_files_only=True)
+
+def _init_worker(model_path: str, device: str, num_threads: int):
+    global _worker_model
+    import torch
+    # Workers split the cores between them instead of each starting one thread per core
+    torch.set_num_threads(num_threads)
+    _worker_model = _load_model(model_path, device)
+
+def _encode_in_worker(texts: List[str], normalize: bool):
+    return _worker_model.encode(texts, batch_size=len(texts), normalize_embeddings=normalize, convert_to_numpy=True)
+
+class SentenceTransformerEmbedder(BaseEmbedder):
+    '''
+    Local CPU embedder running a sentence-transformers model loaded from model_path, fully offline
+    Texts are sorted by token length and packed into batches of at most batch_size texts and max_batch_tokens padded tokens
+    Inputs of at least parallel_threshold texts are spread over num_workers processes; single queries run on the warm in-process model
+    '''
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.config = kwargs
+        self.model_path = self.config.get("model_path", "data/models/all-MiniLM-L6-v2")
+        # Cache key for embeddings, defaulting to the model directory name
+        self.model = self.config.get("embedding_model", os.path.basename(os.path.normpath(self.model_path)))
+        self.device = self.config.get("device", "cpu")
+        self.normalize = self.config.get("normalize_embeddings", True)
+        self.batch_size = self.config.get("batch_size", 64)
+        self.max_batch_tokens = self.config.get("max_batch_tokens", 16384)
+        self.num_workers = self.config.get("num_workers", 1)
+        self.parallel_threshold = self.config.get("parallel_threshold", 2048)
+        self.mp_context = self.config.get("mp_context", "spawn")
+        self._pool = None
+
+        self.encoder = _load_model(self.model_path, self.device)
+        self.max_seq_length = self.encoder.max_seq_length
+        if self.config.get("warmup", True):
+            # The first forward pass allocates buffers and picks kernels, so pay for it at startup rather than on the first query
+            self.encoder.encode(["warmup"], batch_size=1, normalize_embeddings=self.normalize)
+
+    def _token_lengths(self, texts):
+        input_ids = self.encoder.tokenizer(
+            texts, add_special_tokens=True, truncation=True, max_length=self.max_seq_length
+        )["input_ids"]
+        return [len(ids) for ids in input_ids]
+
+    def _make_batches(self, texts):
+        '''
+        Take a list of texts
+        Return lists of indices into texts, of similar length, each within batch_size texts and max_batch_tokens padded tokens
+        '''
+        lengths = self._token_lengths(texts)
+        order = sorted(range(len(texts)), key=lambda idx: lengths[idx], reverse=True)
+        batches = []
+        batch = []
+        for idx in order:
+            # Sorted longest first, so the first text of a batch sets its padded length
+            padded_length = lengths[batch[0]] if batch else lengths[idx]
+            if batch and (len(batch) >= self.batch_size or (len(batch) + 1) * padded_length > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(idx)
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    def _encode_serial(self, batch_texts):
+        return [self.encoder.encode(texts, batch_size=len(texts), normalize_embeddings=self.normalize, convert_to_numpy=True) for texts in batch_texts]
+
+    def _encode_parallel(self, batch_texts):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context(self.mp_context),
+                initializer=_init_worker,
+                initargs=(self.model_path, self.device, max(1, (os.cpu_count() or 1) // self.num_workers))
+            )
+        return list(self._pool.map(_encode_in_worker, batch_texts, [self.normalize] * len(batch_texts)))
+
+    def _embed_uncached(self, texts):
+        if not texts:
+            return []
+        if len(texts) == 1:
+            # Single queries skip tokenizing for batches and the pool and go straight to the warm model
+            return [self.encoder.encode(texts[0], normalize_embeddings=self.normalize, convert_to_numpy=True).tolist()]
+        batches = self._make_batches(texts)
+        batch_texts = [[texts[idx] for idx in batch] for batch in batches]
+        if self.num_workers > 1 and len(texts) >= self.parallel_threshold:
+            results = self._encode_parallel(batch_texts)
+        else:
+            results = self._encode_serial(batch_texts)
+
+        # Put vectors back in input order
+        embeddings = [None] * len(texts)
+        for batch, vectors in zip(batches, results):
+            for idx, vector in zip(batch, vectors):
+                embeddings[idx] = vector.tolist()
+
+        return embeddings
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_data(self, data):
+        # A local list, since pipeline embed workers share one embedder across threads
+        embeddings = []
+        vectors = self.embed_texts([item["text"] for item in data])
+        for item, vector in zip(data, vectors):
+            item["embedding"] = vector
+            embeddings.append(item)
+        return embeddings
+
+    def close(self):
+        '''
+        Shut down the embedding process pool, if one was started
+        '''
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import List
+import hashlib
+import json
+
+from core.caches.SemanticResponseCache import SemanticResponseCache
 
 class BaseGenerator(ABC):
     '''
@@ -8,8 +13,16 @@ class BaseGenerator(ABC):
     def __init__(self, **kwargs):
         '''
         Initialize an LLM generator with optional configuration parameters
+        A process-wide semantic response cache is attached when response_cache_max_entries is configured
         '''
         self.config = kwargs
+        self.response_cache = None
+        if self.config.get("response_cache_max_entries"):
+            self.response_cache = SemanticResponseCache.shared(
+                threshold=self.config.get("response_cache_threshold", 0.95),
+                max_entries=self.config["response_cache_max_entries"],
+                ttl_seconds=self.config.get("response_cache_ttl_seconds", None)
+            )
 
     @abstractmethod
     def generate(self, query: str, context: str) -> str:
@@ -17,4 +30,34 @@ class BaseGenerator(ABC):
         Take a query and a context to pass to LLM
         Return the output string
         '''
-        pass
\ No newline at end of file
+        pass
+
+    def response_namespace(self) -> str:
+        '''
+        Return the class name and a hash of the config that shapes answers, so generators with different prompts or models never share them
+        '''
+        config = {
+            key: value for key, value in self.config.items()
+            if not key.startswith("response_cache_") and key not in ("api_key", "base_url")
+        }
+        config_hash = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        return f"{type(self).__name__}:{config_hash}"
+
+    def cached_generate(self, query: str, context: str, query_embedding: List[float], chunk_ids: List[str]) -> str:
+        '''
+        Take a query, its context, the query embedding and the ids of the retrieved chunks
+        Return a cached answer to a similar query over the same chunks, otherwise generate and cache one
+        '''
+        if self.response_cache is None:
+            return self.generate(query, context)
+        return self.response_cache.get_or_generate(
+            self.response_namespace(), query_embedding, chunk_ids,
+            lambda: self.generate(query, context)
+        )
+
+    def invalidate_response_cache(self) -> int:
+        '''
+        Drop cached answers after the vector store has changed
+        Return the number of answers dropped
+        '''
+        return self.response_cache.invalidate() if self.response_cache is not None else 0
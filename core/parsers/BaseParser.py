@@ -1,16 +1,27 @@
 from abc import ABC, abstractmethod
-from typing import Any, List, Dict
+from typing import Any, Dict, Iterator, List
+
+from core.caches.ArtifactCache import ArtifactCache
+from core.records.RecordBatch import RecordBatch
 
 class BaseParser(ABC):
     '''
     Abstract base class for parsers
     '''
-    
+
+    # Config keys that change how parsing runs but not its output
+    execution_config_keys = ()
+
     def __init__(self, **kwargs):
         '''
         Initialize a parser with optional configuration parameters
+        An artifact cache is attached when cache_path is configured
         '''
         self.config = kwargs
+        self.cache = None
+        if self.config.get("cache_path"):
+            self.cache = ArtifactCache(self.config["cache_path"], max_bytes=self.config.get("cache_max_bytes", 2 * 1024 ** 3))
+            self.cache_namespace = ArtifactCache.namespace(self)
 
     @abstractmethod
     def read(self, obj: Any) -> Any:
@@ -26,4 +37,32 @@ class BaseParser(ABC):
         Take an intermediate object
         Return a list of dictionaries of structured text and metadata
         '''
-        pass
\ No newline at end of file
+        pass
+
+    def iter_parse(self, obj: Any) -> Iterator[Dict]:
+        '''
+        Take an intermediate object
+        Yield dictionaries of structured text and metadata one at a time
+        '''
+        yield from self.parse(obj)
+
+    def parse_columnar(self, obj: Any) -> RecordBatch:
+        '''
+        Take an intermediate object
+        Return its structured text and metadata as a columnar batch
+        '''
+        return RecordBatch.from_records(self.parse(obj))
+
+    def cached_parse(self, file_path: str) -> List[Dict]:
+        '''
+        Take a file path
+        Return its parsed records, reusing the cached ones when the file content is unchanged
+        '''
+        if self.cache is None:
+            return self.parse(file_path)
+        key = ArtifactCache.file_key(self.cache_namespace, file_path)
+        records = self.cache.get(key)
+        if records is None:
+            records = self.parse(file_path)
+            self.cache.put(key, self.cache_namespace, records)
+        return records
@@ -1,38 +1,93 @@
 from core.parsers.BaseParser import BaseParser
+from core.records.RecordBatch import DictionaryColumn, RecordBatch
 from boilerpy3 import extractors
-import nltk
+import numpy as np
 
-nltk.download('punkt_tab')
+PUNKT_RESOURCE = ("tokenizers/punkt_tab", "punkt_tab")
+
+def _load_sent_tokenize(data_dir=None, download=False):
+    '''
+    Take an optional local NLTK data directory and whether a missing tokenizer may be downloaded
+    Return nltk.sent_tokenize once the punkt_tab tokenizer is found locally
+    '''
+    import nltk
+    if data_dir is not None and data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+
+    resource, package = PUNKT_RESOURCE
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        if not download:
+            raise LookupError(
+                f"NLTK {package} tokenizer not found in {data_dir or 'the default NLTK data paths'}, "
+                f"install it once with nltk.download('{package}', download_dir=<nltk_data_dir>) "
+                f"and set nltk_data_dir in the parser config, or set nltk_download: true to fetch it on first parse"
+            ) from None
+        # Only reached when downloading was explicitly enabled and the tokenizer is not cached yet
+        nltk.download(package, download_dir=data_dir, quiet=True)
+        nltk.data.find(resource)
+    return nltk.sent_tokenize
 
 class HtmlParser(BaseParser):
+    '''
+    HTML parser yielding one record per sentence of the extracted article text
+    NLTK and its punkt_tab tokenizer are loaded on the first parse, from nltk_data_dir or NLTK's default paths
+    The tokenizer is never downloaded unless nltk_download is set
+    '''
+
+    execution_config_keys = ("nltk_data_dir", "nltk_download")
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.config = kwargs
         self.extractor = extractors.ArticleExtractor()
+        self.nltk_data_dir = self.config.get("nltk_data_dir", None)
+        self.nltk_download = self.config.get("nltk_download", False)
+        self._sent_tokenize = None
+
+    def sent_tokenizer(self):
+        # Resolved outside the extraction try blocks so a missing tokenizer is raised, not swallowed
+        if self._sent_tokenize is None:
+            self._sent_tokenize = _load_sent_tokenize(self.nltk_data_dir, self.nltk_download)
+        return self._sent_tokenize
 
     def read(self, obj):
         self.intermediate = self.extractor.get_content_from_file(obj)
         self.filename = obj
         return self.intermediate
     
-    def parse(self, obj):
+    def _sentences(self, obj):
+        '''
+        Take a file path
+        Return the sentences of its extracted article text, or none if it cannot be split
+        '''
         if not hasattr(self, "intermediate") or self.filename != obj:
             self.read(obj)
-        
-        self.data = []
+        sent_tokenize = self.sent_tokenizer()
         try:
-            clean_content = nltk.sent_tokenize(self.intermediate)
-            seq_num = 0
-            for content in clean_content:
-                self.data.append({
-                    "file_type": "html",
-                    "file_name": self.filename,
-                    "text": content,
-                    "marker": seq_num
-                })
-                seq_num += 1
-            
+            return sent_tokenize(self.intermediate)
         except Exception as e:
-            print(f"Error with BoilerPy3 extraction: {e}")
-        finally:
-            return self.data
\ No newline at end of file
+            print(f"Error splitting {self.filename} into sentences: {e}")
+            return []
+
+    def parse(self, obj):
+        self.data = []
+        for seq_num, content in enumerate(self._sentences(obj)):
+            self.data.append({
+                "file_type": "html",
+                "file_name": self.filename,
+                "text": content,
+                "marker": seq_num
+            })
+        return self.data
+
+    def parse_columnar(self, obj):
+        # One row per sentence, with the file-level fields stored once for the whole file
+        sentences = self._sentences(obj)
+        return RecordBatch({
+            "file_type": DictionaryColumn.repeat("html", len(sentences)),
+            "file_name": DictionaryColumn.repeat(self.filename, len(sentences)),
+            "text": sentences,
+            "marker": np.arange(len(sentences), dtype=np.int64)
+        }, len(sentences))
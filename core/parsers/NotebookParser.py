@@ -1,11 +1,22 @@
 from core.parsers.BaseParser import BaseParser
+import ijson
 import json
 import re
 
 class NotebookParser(BaseParser):
+    '''
+    Notebook parser yielding one record per cell
+    In streaming mode the notebook is read as a stream of JSON events, so skipped outputs such as images are never kept
+    and memory is bounded by the largest kept cell; output text is capped at max_output_chars per output
+    '''
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.config = kwargs
+        self.streaming = self.config.get("streaming", True)
+        self.keep_mime_types = set(self.config.get("keep_mime_types", ["text/plain"]))
+        self.max_output_chars = self.config.get("max_output_chars", 10000)
+        self.max_cell_output_chars = self.config.get("max_cell_output_chars", 50000)
 
     def read(self, obj):
         with open(obj, 'r', encoding='utf-8') as f:
@@ -13,58 +24,120 @@ class NotebookParser(BaseParser):
 
         self.filename = obj
         return self.intermediate
-    
-    def parse(self, obj):
-        if not hasattr(self, "intermediate") or self.filename != obj:
-            self.read(obj)
-        self.data = []
-        seq_num = 0
-        
-        # Extract cells
+
+    @staticmethod
+    def _capped(parts, limit):
+        '''
+        Take string parts and a character limit
+        Return their concatenation, truncated to the limit with a note of what was dropped
+        '''
+        text = "".join(parts)
+        if limit is None or len(text) <= limit:
+            return text
+        return f"{text[:limit]}\n... [truncated {len(text) - limit} chars]"
+
+    def _output_text(self, output_type, text, data, traceback):
+        if output_type == 'stream':
+            return self._capped(text, self.max_output_chars) + "\n"
+        elif output_type == 'execute_result':
+            return self._capped(data.get('text/plain', []), self.max_output_chars) + "\n"
+        elif output_type == 'error':
+            return self._capped(["Error: ".join(traceback)], self.max_output_chars) + "\n"
+        return None
+
+    @staticmethod
+    def _as_list(value):
+        # nbformat allows multiline strings either as one string or as a list of lines
+        return [value] if isinstance(value, str) else value
+
+    def _iter_cells_loaded(self):
         for cell in self.intermediate.get('cells', []):
-            cell_type = cell.get('cell_type')
+            outputs = []
+            for output in cell.get('outputs', []):
+                data = {
+                    mime: self._as_list(value) for mime, value in output.get('data', {}).items()
+                    if mime in self.keep_mime_types
+                }
+                outputs.append(self._output_text(
+                    output.get('output_type'),
+                    self._as_list(output.get('text', [])),
+                    data,
+                    output.get('traceback', [])
+                ))
+            yield cell.get('cell_type'), self._as_list(cell.get('source', [])), outputs
+
+    def _iter_cells_streaming(self, obj):
+        '''
+        Take a notebook path
+        Yield (cell type, source parts, output texts) per cell from a stream of JSON parse events
+        '''
+        # nbformat writes keys sorted, so a cell's outputs arrive before its source and an output's data before its type
+        cell = output = None
+        with open(obj, 'rb') as f:
+            for prefix, event, value in ijson.parse(f):
+                if not prefix.startswith("cells.item"):
+                    continue
+                if prefix == "cells.item":
+                    if event == "start_map":
+                        cell = {"cell_type": None, "source": [], "outputs": []}
+                    elif event == "end_map":
+                        yield cell["cell_type"], cell["source"], cell["outputs"]
+                        cell = None
+                elif prefix == "cells.item.cell_type":
+                    cell["cell_type"] = value
+                elif prefix in ("cells.item.source", "cells.item.source.item"):
+                    if event == "string":
+                        cell["source"].append(value)
+                elif prefix == "cells.item.outputs.item":
+                    if event == "start_map":
+                        output = {"output_type": None, "text": [], "data": {}, "traceback": []}
+                    elif event == "end_map":
+                        cell["outputs"].append(self._output_text(
+                            output["output_type"], output["text"], output["data"], output["traceback"]
+                        ))
+                        output = None
+                elif prefix == "cells.item.outputs.item.output_type":
+                    output["output_type"] = value
+                elif prefix in ("cells.item.outputs.item.text", "cells.item.outputs.item.text.item"):
+                    if event == "string":
+                        output["text"].append(value)
+                elif prefix == "cells.item.outputs.item.traceback.item":
+                    output["traceback"].append(value)
+                elif prefix.startswith("cells.item.outputs.item.data.") and event == "string":
+                    mime = prefix[len("cells.item.outputs.item.data."):].removesuffix(".item")
+                    # Images, HTML and other rich outputs are dropped as soon as their value is parsed
+                    if mime in self.keep_mime_types:
+                        output["data"].setdefault(mime, []).append(value)
+
+    def iter_parse(self, obj):
+        if self.streaming:
+            self.filename = obj
+            cells = self._iter_cells_streaming(obj)
+        else:
+            if not hasattr(self, "intermediate") or self.filename != obj:
+                self.read(obj)
+            cells = self._iter_cells_loaded()
+
+        for seq_num, (cell_type, source, outputs) in enumerate(cells):
             if cell_type == 'markdown': # Markdown cell
-                md_content = "Text block:\n"
-                md_content += "".join(cell.get('source', [])) + "\n"
-                # print(md_content)
-                self.data.append({
-                    "file_type": "ipynb",
-                    "file_name": self.filename,
-                    "marker": seq_num,
-                    "text": md_content
-                })
+                text = "".join(["Text block:\n", *source, "\n"])
             elif cell_type == 'code':
-                code_content = "Code block:\n"
-                code_content += "".join(cell.get('source', [])) + "\n"
-                # print(code_content)
-                # code_source = ''.join(code_content)
-                # outputs = []
-                code_content += "Output:\n"
-                
-                # Extract outputs
-                for output in cell.get('outputs', []):
-                    if output.get('output_type') == 'stream':
-                        code_content += "".join(output.get('text', [])) + "\n"
-                        # print(output_content)
-                        # outputs.append(output_content)
-                    elif output.get('output_type') == 'execute_result':
-                        code_content += "".join(output.get('data', {}).get('text/plain', [])) + "\n"
-                        # print(output_content)
-                        # outputs.append(output_content)
-                    elif output.get('output_type') == 'error':
-                        code_content += "Error: ".join(output.get('traceback', [])) + "\n"
-                        # print(output_content)
-                        # outputs.append('Error: ' + output_content)
-
-                self.data.append({
-                    "file_type": "ipynb",
-                    "file_name": self.filename,
-                    "marker": seq_num,
-                    "text": code_content
-                })
-
-            seq_num += 1
-        
+                kept_outputs = [output for output in outputs if output is not None]
+                text = "".join([
+                    "Code block:\n", *source, "\n",
+                    "Output:\n", self._capped(kept_outputs, self.max_cell_output_chars)
+                ])
+            else:
+                continue
+            yield {
+                "file_type": "ipynb",
+                "file_name": self.filename,
+                "marker": seq_num,
+                "text": text
+            }
+
+    def parse(self, obj):
+        self.data = list(self.iter_parse(obj))
         return self.data
     
 
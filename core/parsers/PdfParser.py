@@ -1,34 +1,112 @@
+from concurrent.futures import ProcessPoolExecutor
 from core.parsers.BaseParser import BaseParser
 from pypdf import PdfReader
+import multiprocessing
 import re
 
+# Ignore <latexit> tags
+LATEXIT_PATTERN = re.compile(r"<latexit[^>]*>.*?</latexit>")
+
+def _open_document(backend, obj):
+    if backend == "pymupdf":
+        # Optional backend, shipped with pymupdf4llm
+        import pymupdf
+        return pymupdf.open(obj)
+    return PdfReader(obj)
+
+def _close_document(document):
+    # PyMuPDF documents hold a file handle and native memory until closed; pypdf readers close their stream if they own it
+    close = getattr(document, "close", None)
+    if close is not None:
+        close()
+
+def _num_pages(backend, document):
+    return document.page_count if backend == "pymupdf" else len(document.pages)
+
+def _page_text(backend, document, i):
+    if backend == "pymupdf":
+        return document.load_page(i).get_text("text")
+    return document.pages[i].extract_text()
+
+def _extract_pages(backend, obj, start, end):
+    '''
+    Take a backend, a file path and a page range
+    Return the cleaned text of each page in the range, opening the document in this process
+    '''
+    document = _open_document(backend, obj)
+    try:
+        return [LATEXIT_PATTERN.sub("", _page_text(backend, document, i)) for i in range(start, end)]
+    finally:
+        _close_document(document)
+
+
 class PdfParser(BaseParser):
+    '''
+    PDF parser yielding one record per page, with a pypdf or PyMuPDF backend
+    Documents with at least parallel_page_threshold pages are split into page ranges extracted by page_workers processes
+    '''
+
+    execution_config_keys = ("page_workers", "parallel_page_threshold", "mp_context")
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.config = kwargs
-        self.parser = PdfReader
+        self.backend = self.config.get("backend", "pypdf")
+        if self.backend not in ("pypdf", "pymupdf"):
+            raise ValueError(f"Unknown PDF backend '{self.backend}', expected 'pypdf' or 'pymupdf'")
+        self.page_workers = self.config.get("page_workers", 1)
+        self.parallel_page_threshold = self.config.get("parallel_page_threshold", 200)
+        self.mp_context = self.config.get("mp_context", "spawn")
 
     def read(self, obj):
-        self.intermediate = self.parser(obj)
+        self.intermediate = _open_document(self.backend, obj)
         self.filename = obj
         return self.intermediate
-    
-    def parse(self, obj):
-        if not hasattr(self, "intermediate") or self.filename != obj:
+
+    def _page_texts(self, obj):
+        if getattr(self, "intermediate", None) is None or self.filename != obj:
             self.read(obj)
-        num_pages = len(self.intermediate.pages)
-
-        # Ignore <latexit> tags
-        latexit_pattern = r"<latexit[^>]*>.*?</latexit>"
-        self.data = []
-        for i in range(num_pages):
-            text = self.intermediate.pages[i].extract_text()
-            cleaned_text = re.sub(latexit_pattern, "", text)
-            self.data.append({
+        try:
+            yield from self._extract_page_texts(obj)
+        finally:
+            # Released once the pages are extracted, or the parse is abandoned, so bulk ingest does not keep every PDF open
+            _close_document(self.intermediate)
+            self.intermediate = None
+
+    def _extract_page_texts(self, obj):
+        num_pages = _num_pages(self.backend, self.intermediate)
+
+        if self.page_workers <= 1 or num_pages < self.parallel_page_threshold:
+            for i in range(num_pages):
+                yield LATEXIT_PATTERN.sub("", _page_text(self.backend, self.intermediate, i))
+            return
+
+        # Contiguous page ranges, a few per worker, come back in order so pages still stream in sequence
+        range_size = -(-num_pages // (4 * self.page_workers))
+        starts = range(0, num_pages, range_size)
+        with ProcessPoolExecutor(
+            max_workers=self.page_workers,
+            mp_context=multiprocessing.get_context(self.mp_context)
+        ) as executor:
+            ranges = executor.map(
+                _extract_pages,
+                [self.backend] * len(starts),
+                [obj] * len(starts),
+                starts,
+                [min(start + range_size, num_pages) for start in starts]
+            )
+            for texts in ranges:
+                yield from texts
+
+    def iter_parse(self, obj):
+        for i, text in enumerate(self._page_texts(obj)):
+            yield {
                 "file_type": "pdf",
                 "file_name": self.filename,
                 "marker": i+1,
-                "text": cleaned_text
-            })
+                "text": text
+            }
 
-        return self.data
\ No newline at end of file
+    def parse(self, obj):
+        self.data = list(self.iter_parse(obj))
+        return self.data
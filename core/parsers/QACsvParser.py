@@ -1,34 +1,56 @@
 from core.parsers.BaseParser import BaseParser
 import pandas as pd
-import nltk
-
-nltk.download('punkt_tab')
 
 class QACsvParser(BaseParser):
+    '''
+    Parser for question/answer CSV files, one record per row
+    Record text is assembled with vectorized string operations; with chunksize set, rows are read and yielded in batches
+    '''
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.config = kwargs
+        self.chunksize = self.config.get("chunksize", None)
+
+    def _read_csv(self, obj, **kwargs):
+        return pd.read_csv(obj, skiprows=1, names=["info", "question", "answer"], **kwargs)
 
     def read(self, obj):
-        self.intermediate = pd.read_csv(obj, skiprows=1, names=["info", "question", "answer"])
-        self.intermediate["info"] = self.intermediate["info"].fillna("No extra information given")
+        self.intermediate = self._read_csv(obj)
         self.filename = obj
         return self.intermediate
-    
+
+    @staticmethod
+    def _as_text(column):
+        # Missing values render as "nan", as they did when formatted row by row
+        return column.fillna("nan").astype(str)
+
+    def _records(self, frame):
+        info = frame["info"].fillna("No extra information given").astype(str)
+        text = "Info: " + info + "\nQuestion: " + self._as_text(frame["question"]) + "\nAnswer: " + self._as_text(frame["answer"])
+        # The index keeps counting across chunks, so markers stay file-wide row numbers
+        markers = frame.index + 1
+        return pd.DataFrame({
+            "file_type": "csv",
+            "file_name": self.filename,
+            "marker": markers,
+            "sub_marker": markers, # Not necessary since we are not chunking
+            "text": text,
+            "first_10_words": text.str.split(n=10).str[:10].str.join(" ")
+        }).to_dict(orient="records")
+
+    def iter_parse(self, obj):
+        if self.chunksize is None:
+            yield from self.parse(obj)
+            return
+        self.filename = obj
+        with self._read_csv(obj, chunksize=self.chunksize) as reader:
+            for frame in reader:
+                yield from self._records(frame)
+
     def parse(self, obj):
         if not hasattr(self, "intermediate") or self.filename != obj:
             self.read(obj)
-        
-        self.data = []
-        for index, row in self.intermediate.iterrows():
-            text = f"Info: {row['info']}\nQuestion: {row['question']}\nAnswer: {row['answer']}"
-            self.data.append({
-                "file_type": "csv",
-                "file_name": self.filename,
-                "marker": index+1,
-                "sub_marker": index+1, # Not necessary since we are not chunking
-                "text": text,
-                "first_10_words": " ".join(text.split()[:10])
-            })
-
-        return self.data
\ No newline at end of file
+
+        self.data = self._records(self.intermediate)
+        return self.data
@@ -0,0 +1,169 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+import multiprocessing
+import os
+
+from core.checkpoints.IngestionCheckpoint import IngestionCheckpoint
+from core.pipelines.BasePipeline import BasePipeline
+from core.utils import initialize_all_parsers, initialize_chunker, parser_router
+
+# Per-process parsers and chunker, built once by the pool initializer
+_worker_parsers = None
+_worker_chunker = None
+
+def _init_worker(parsers_config: Dict, chunker_config: Dict):
+    global _worker_parsers, _worker_chunker
+    # Files are already spread across processes, so parsers and chunker must not start pools of their own
+    _worker_parsers = initialize_all_parsers({
+        file_type: {**config, "config": {**config.get("config", {}), "page_workers": 1}} if "page_workers" in config.get("config", {}) else config
+        for file_type, config in parsers_config.items()
+    })
+    _worker_chunker = initialize_chunker({**chunker_config, "config": {**chunker_config.get("config", {}), "num_workers": 1}})
+
+def _parse_and_chunk(file_path: str, parsers: Dict = None, chunker=None) -> Tuple[str, List[Dict], str]:
+    '''
+    Take a file path, and optionally the parsers and chunker to use instead of the worker's own
+    Return the file path, its chunks and an error message (None on success)
+    '''
+    parsers = parsers if parsers is not None else _worker_parsers
+    chunker = chunker if chunker is not None else _worker_chunker
+    try:
+        parser = parser_router(parsers, file_path)
+        if parser is None:
+            return file_path, None, f"No parser for file type '{file_path.split('.')[-1]}'"
+        return file_path, chunker.cached_chunk(parser.cached_parse(file_path)), None
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {e}"
+
+
+class ParallelIngestionPipeline(BasePipeline):
+    '''
+    Ingestion pipeline that parses and chunks files in a process pool
+    and feeds a single in-process embedding and upsert stage, in deterministic file order
+    '''
+
+    def __init__(self, parsers, chunker, embedder, vector_store, retriever, generator, **kwargs):
+        super().__init__(parsers, chunker, embedder, vector_store, retriever, generator, **kwargs)
+        # Workers rebuild parsers and chunker from config rather than unpickling live objects
+        self.parsers_config = self.config.get("parsers_config", {})
+        self.chunker_config = self.config.get("chunker_config", {})
+        self.num_workers = self.config.get("num_workers") or os.cpu_count()
+        self.embed_batch_size = self.config.get("embed_batch_size", 512)
+        self.store_batch_size = self.config.get("store_batch_size", 100)
+        self.mp_context = self.config.get("mp_context", "spawn")
+        # Optional deduplicator between the chunker and the embedder
+        self.deduplicator = self.config.get("deduplicator", None)
+        self.failures = []
+
+    def list_files(self, directory: str) -> List[str]:
+        return sorted(str(path) for path in Path(directory).rglob("*") if path.is_file())
+
+    def parse_and_chunk_directory(self, directory: str, checkpoint: IngestionCheckpoint = None) -> Iterator[Tuple[str, List[Dict]]]:
+        '''
+        Take a directory, and optionally a checkpoint whose completed files are skipped
+        Yield (file path, chunks) for every file in sorted path order, recording failed files in self.failures
+        '''
+        self.failures = []
+        file_paths = self.list_files(directory)
+        if checkpoint is not None:
+            remaining = [file_path for file_path in file_paths if not checkpoint.is_complete(file_path)]
+            print(f"Skipping {len(file_paths) - len(remaining)} file(s) completed in checkpoint")
+            file_paths = remaining
+        if self.num_workers <= 1:
+            results = (_parse_and_chunk(file_path, self.parsers, self.chunker) for file_path in file_paths)
+            yield from self._collect(results)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context(self.mp_context),
+            initializer=_init_worker,
+            initargs=(self.parsers_config, self.chunker_config)
+        ) as executor:
+            # map runs files concurrently but yields results in submission order
+            yield from self._collect(executor.map(_parse_and_chunk, file_paths))
+
+    def _collect(self, results):
+        for file_path, chunks, error in results:
+            if error is not None:
+                print(f"Failed on: {file_path} ({error})")
+                self.failures.append({"file_name": file_path, "error": error})
+                continue
+            print(f"Parsed and chunked: {file_path} ({len(chunks)} chunks)")
+            yield file_path, chunks
+
+    def _embed_and_store(self, chunks: List[Dict], store: bool) -> List[Dict]:
+        embedded = self.embedder.embed_data(chunks)
+        if store:
+            self.vector_store.store_batch(embedded, self.store_batch_size)
+        return embedded
+
+    def _embed_and_checkpoint(self, chunks: List[Dict], files: List[Tuple[str, List[str], List[Dict]]], store: bool, checkpoint: IngestionCheckpoint):
+        # Chunks are logged before their files are marked complete, so a crash in between only costs a re-parse
+        hashes = [checkpoint.chunk_hash(chunk) for chunk in chunks]
+        checkpoint.append_chunks(self._embed_and_store(chunks, store) if chunks else [], hashes)
+        for file_path, chunk_hashes, duplicates in files:
+            checkpoint.complete_file(file_path, chunk_hashes, duplicates)
+
+    def ingest_object(self, obj):
+        _, chunks, error = _parse_and_chunk(str(obj), self.parsers, self.chunker)
+        if error is not None:
+            raise RuntimeError(f"Failed to ingest {obj}: {error}")
+        if self.deduplicator is not None:
+            chunks = self.deduplicator.deduplicate(chunks)
+        return self._embed_and_store(chunks, store=True)
+
+    def ingest_objects_from_directory(self, directory, store=True, checkpoint: IngestionCheckpoint = None):
+        '''
+        Take a directory, whether to push the embedded chunks to the vector store and an optional checkpoint
+        Return all embedded chunks in file order; failed files are reported and skipped
+        With a checkpoint, finished files are not re-parsed, embedded chunks are not re-embedded,
+        and progress is logged after every embedding batch
+        '''
+        embedded = []
+        pending = []
+        pending_files = []
+        if checkpoint is not None and self.deduplicator is not None:
+            # Chunks kept by the interrupted run still shadow their duplicates in the files left to do,
+            # and the duplicates it dropped restore their provenance and the deduplication counts
+            self.deduplicator.register(list(checkpoint.iter_chunks()), checkpoint.iter_duplicates())
+        for file_path, chunks in self.parse_and_chunk_directory(directory, checkpoint):
+            duplicates = []
+            if self.deduplicator is not None:
+                chunks, duplicates = self.deduplicator.deduplicate_with_links(chunks)
+            if checkpoint is None:
+                pending.extend(chunks)
+            else:
+                hashes = [checkpoint.chunk_hash(chunk) for chunk in chunks]
+                pending.extend(chunk for chunk, chunk_hash in zip(chunks, hashes) if not checkpoint.has_chunk(chunk_hash))
+                pending_files.append((file_path, hashes, duplicates))
+            # Embed in large batches across file boundaries so small files still fill requests
+            if len(pending) >= self.embed_batch_size:
+                if checkpoint is None:
+                    embedded.extend(self._embed_and_store(pending, store))
+                else:
+                    self._embed_and_checkpoint(pending, pending_files, store, checkpoint)
+                    pending_files = []
+                pending = []
+        if checkpoint is not None:
+            self._embed_and_checkpoint(pending, pending_files, store, checkpoint)
+            embedded = list(checkpoint.iter_chunks(self.list_files(directory)))
+            if self.deduplicator is not None:
+                # Logged chunks only carry the duplicates found before they were written, the deduplicator has them all
+                for item in embedded:
+                    duplicates = self.deduplicator.duplicates_of(item)
+                    if duplicates is not None:
+                        item["duplicates"] = duplicates
+        elif pending:
+            embedded.extend(self._embed_and_store(pending, store))
+
+        if self.deduplicator is not None:
+            print(f"Deduplication: {self.deduplicator.stats()}")
+
+        if self.failures:
+            print(f"{len(self.failures)} file(s) failed:")
+            for failure in self.failures:
+                print(f"  {failure['file_name']}: {failure['error']}")
+
+        return embedded
@@ -0,0 +1,193 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+import queue
+import threading
+import time
+
+from core.pipelines.BasePipeline import BasePipeline
+from core.utils import parser_router
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class StreamingPipeline(BasePipeline):
+    '''
+    Bounded-memory ingestion pipeline: parse -> chunk -> embed -> store
+    Stages run on their own threads and exchange records through bounded queues,
+    so a slow stage (typically the embedding API) blocks the stages upstream of it
+    '''
+
+    def __init__(self, parsers, chunker, embedder, vector_store, retriever, generator, **kwargs):
+        super().__init__(parsers, chunker, embedder, vector_store, retriever, generator, **kwargs)
+        self.queue_size = self.config.get("queue_size", 1024)
+        self.embed_batch_size = self.config.get("embed_batch_size", 256)
+        self.chunk_batch_size = self.config.get("chunk_batch_size", 1024)
+        self.store_batch_size = self.config.get("store_batch_size", 100)
+        self.num_embed_workers = self.config.get("num_embed_workers", 2)
+        self.report_interval = self.config.get("report_interval", 10.0)
+        # Optional deduplicator between the chunker and the embedder
+        self.deduplicator = self.config.get("deduplicator", None)
+        self.queues = {}
+        self.counters = {}
+        self.failures = []
+
+    def queue_depths(self) -> Dict[str, int]:
+        '''
+        Return the number of items waiting in each inter-stage queue
+        '''
+        return {name: q.qsize() for name, q in self.queues.items()}
+
+    def _put(self, q: queue.Queue, item):
+        # Blocking put that gives up once another stage has failed
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self, q: queue.Queue, num_producers: int = 1) -> Iterator:
+        '''
+        Take a queue and the number of stages feeding it
+        Yield its items until every producer has signalled completion
+        '''
+        remaining = num_producers
+        while remaining and not self._stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _run_stage(self, name: str, target: Callable, *args):
+        def run():
+            try:
+                target(*args)
+            except Exception as e:
+                print(f"Stage {name} failed: {type(e).__name__}: {e}")
+                self._error = e
+                self._stop.set()
+        thread = threading.Thread(target=run, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _parse_stage(self, file_paths: Iterator[str]):
+        for file_path in file_paths:
+            try:
+                parser = parser_router(self.parsers, file_path)
+                if parser is None:
+                    raise ValueError(f"No parser for file type '{file_path.split('.')[-1]}'")
+                # A cached file is already fully parsed, otherwise records are streamed as the parser produces them
+                records = parser.cached_parse(file_path) if parser.cache is not None else parser.iter_parse(file_path)
+                for record in records:
+                    self._put(self.queues["parsed"], record)
+                    self._count("parsed")
+                self._count("files")
+            except Exception as e:
+                print(f"Failed on: {file_path} ({type(e).__name__}: {e})")
+                self.failures.append({"file_name": file_path, "error": f"{type(e).__name__}: {e}"})
+        self._put(self.queues["parsed"], _DONE)
+
+    def _chunk_batch(self, records: List[Dict]):
+        chunks = self.chunker.cached_chunk(records)
+        self._count("chunked", len(chunks))
+        if self.deduplicator is not None:
+            chunks = self.deduplicator.deduplicate(chunks)
+        for chunk in chunks:
+            self._put(self.queues["chunked"], chunk)
+
+    def _chunk_stage(self):
+        # Records of one file arrive together, so they are chunked (and cached) per file, in slices of at most chunk_batch_size
+        records = []
+        for record in self._drain(self.queues["parsed"]):
+            if records and (record["file_name"] != records[0]["file_name"] or len(records) >= self.chunk_batch_size):
+                self._chunk_batch(records)
+                records = []
+            records.append(record)
+        if records:
+            self._chunk_batch(records)
+        for _ in range(self.num_embed_workers):
+            self._put(self.queues["chunked"], _DONE)
+
+    def _embed_stage(self):
+        batch = []
+        for chunk in self._drain(self.queues["chunked"]):
+            batch.append(chunk)
+            if len(batch) >= self.embed_batch_size:
+                self._put(self.queues["embedded"], self.embedder.embed_data(batch))
+                self._count("embedded", len(batch))
+                batch = []
+        if batch:
+            self._put(self.queues["embedded"], self.embedder.embed_data(batch))
+            self._count("embedded", len(batch))
+        self._put(self.queues["embedded"], _DONE)
+
+    def _store_stage(self, sink: Optional[Callable[[List[Dict]], None]]):
+        for batch in self._drain(self.queues["embedded"], self.num_embed_workers):
+            if self.vector_store is not None:
+                self.vector_store.store_batch(batch, self.store_batch_size)
+            if sink is not None:
+                sink(batch)
+            self._count("stored", len(batch))
+
+    def run(self, file_paths: Iterator[str], sink: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
+        '''
+        Take an iterator of file paths and an optional sink called with every embedded batch
+        Stream them through all stages and return the per-stage counters
+        '''
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._error = None
+        self.failures = []
+        self.counters = {}
+        # Embedded batches are the largest items, so that queue holds whole batches rather than records
+        self.queues = {
+            "parsed": queue.Queue(maxsize=self.queue_size),
+            "chunked": queue.Queue(maxsize=self.queue_size),
+            "embedded": queue.Queue(maxsize=max(2, self.num_embed_workers)),
+        }
+
+        threads = [
+            self._run_stage("parse", self._parse_stage, iter(file_paths)),
+            self._run_stage("chunk", self._chunk_stage),
+            *[self._run_stage(f"embed-{i}", self._embed_stage) for i in range(self.num_embed_workers)],
+            self._run_stage("store", self._store_stage, sink),
+        ]
+
+        start_time = time.perf_counter()
+        last_report = start_time
+        while any(thread.is_alive() for thread in threads):
+            threads[-1].join(timeout=0.5)
+            if self.report_interval and time.perf_counter() - last_report >= self.report_interval:
+                last_report = time.perf_counter()
+                print(f"[{last_report - start_time:.0f}s] processed: {self.counters}, queue depths: {self.queue_depths()}")
+            if self._stop.is_set():
+                break
+
+        for thread in threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+
+        print(f"Finished streaming ingestion in {time.perf_counter() - start_time:.1f}s: {self.counters}")
+        if self.deduplicator is not None:
+            print(f"Deduplication: {self.deduplicator.stats()}")
+        if self.failures:
+            print(f"{len(self.failures)} file(s) failed")
+        return dict(self.counters)
+
+    def ingest_object(self, obj, sink=None):
+        return self.run(iter([str(obj)]), sink)
+
+    def ingest_objects_from_directory(self, directory, sink=None):
+        # rglob is itself lazy, so the file list is never materialized either
+        file_paths = (str(path) for path in Path(directory).rglob("*") if path.is_file())
+        return self.run(file_paths, sink)
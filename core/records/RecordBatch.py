@@ -0,0 +1,205 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import sys
+
+import numpy as np
+
+# String columns repeated on every record of a file, stored once per batch
+DICTIONARY_COLUMNS = ("file_type", "file_name")
+
+class _Missing:
+    '''
+    Placeholder for a key absent from some records, dropped again when converting back to dicts
+    '''
+    def __repr__(self):
+        return "MISSING"
+
+MISSING = _Missing()
+
+
+class DictionaryColumn:
+    '''
+    Dictionary-encoded column: int32 codes into a list of distinct values
+    '''
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes: np.ndarray, categories: List[Any]):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any]) -> "DictionaryColumn":
+        index = {}
+        codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32)
+        return cls(codes, list(index))
+
+    @classmethod
+    def repeat(cls, value: Any, num_rows: int) -> "DictionaryColumn":
+        return cls(np.zeros(num_rows, dtype=np.int32), [value])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row: int):
+        return self.categories[self.codes[row]]
+
+    def take(self, rows: np.ndarray) -> "DictionaryColumn":
+        return DictionaryColumn(self.codes[rows], self.categories)
+
+    def to_list(self) -> List[Any]:
+        return [self.categories[code] for code in self.codes.tolist()]
+
+
+def _take(column, rows: np.ndarray):
+    if isinstance(column, DictionaryColumn):
+        return column.take(rows)
+    if isinstance(column, np.ndarray):
+        return column[rows]
+    # Python lists keep references, so strings are shared rather than copied
+    return [column[row] for row in rows.tolist()]
+
+def _to_list(column) -> List[Any]:
+    if isinstance(column, DictionaryColumn):
+        return column.to_list()
+    if isinstance(column, np.ndarray):
+        # Embeddings stay as per-row arrays, scalar columns become Python scalars
+        return list(column) if column.ndim > 1 else column.tolist()
+    return column
+
+def _concat(columns: List[Any]):
+    if all(isinstance(column, DictionaryColumn) for column in columns):
+        index = {}
+        codes = []
+        for column in columns:
+            remap = np.fromiter((index.setdefault(value, len(index)) for value in column.categories), dtype=np.int32)
+            codes.append(remap[column.codes] if len(column.codes) else column.codes)
+        return DictionaryColumn(np.concatenate(codes), list(index))
+    if all(isinstance(column, np.ndarray) for column in columns):
+        return np.concatenate(columns)
+    return [value for column in columns for value in _to_list(column)]
+
+
+class RecordBatch:
+    '''
+    Columnar batch of records passed between pipeline stages
+    File-level strings are dictionary-encoded, integer and float columns are NumPy arrays,
+    embeddings are one float32 matrix and free text stays a list of str
+    '''
+
+    def __init__(self, columns: Dict[str, Any], num_rows: Optional[int] = None):
+        self.columns = columns
+        self.num_rows = num_rows if num_rows is not None else (len(next(iter(columns.values()))) if columns else 0)
+
+    @staticmethod
+    def _encode(name: str, values: List[Any], dictionary_columns: Sequence[str]):
+        if any(value is MISSING for value in values):
+            return values
+        if name == "embedding":
+            return np.asarray(values, dtype=np.float32)
+        if name in dictionary_columns:
+            return DictionaryColumn.from_values(values)
+        if values and all(type(value) is int for value in values):
+            return np.asarray(values, dtype=np.int64)
+        if values and all(type(value) is float for value in values):
+            return np.asarray(values, dtype=np.float64)
+        return values
+
+    @classmethod
+    def from_records(cls, records: List[Dict], dictionary_columns: Sequence[str] = DICTIONARY_COLUMNS) -> "RecordBatch":
+        '''
+        Take a list of dictionaries of structured text and metadata
+        Return them as a columnar batch
+        '''
+        names = list(dict.fromkeys(key for record in records for key in record))
+        columns = {
+            name: cls._encode(name, [record.get(name, MISSING) for record in records], dictionary_columns)
+            for name in names
+        }
+        return cls(columns, len(records))
+
+    @classmethod
+    def concat(cls, batches: List["RecordBatch"]) -> "RecordBatch":
+        batches = [batch for batch in batches if batch.num_rows]
+        if not batches:
+            return cls({}, 0)
+        names = list(dict.fromkeys(name for batch in batches for name in batch.columns))
+        columns = {}
+        for name in names:
+            parts = [
+                batch.columns[name] if name in batch.columns else [MISSING] * batch.num_rows
+                for batch in batches
+            ]
+            columns[name] = _concat(parts)
+        return cls(columns, sum(batch.num_rows for batch in batches))
+
+    def __len__(self):
+        return self.num_rows
+
+    def __contains__(self, name: str):
+        return name in self.columns
+
+    def __getitem__(self, name: str):
+        '''
+        Take a column name
+        Return its values as a list, or as the underlying array for numeric and embedding columns
+        '''
+        column = self.columns[name]
+        return column.to_list() if isinstance(column, DictionaryColumn) else column
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def row(self, row: int) -> Dict:
+        record = {}
+        for name, column in self.columns.items():
+            value = column[row]
+            if value is MISSING:
+                continue
+            record[name] = value.item() if isinstance(value, np.generic) else value
+        return record
+
+    def to_records(self) -> List[Dict]:
+        '''
+        Return the batch as a list of dictionaries, the format every stage accepts
+        '''
+        names = list(self.columns)
+        columns = [_to_list(self.columns[name]) for name in names]
+        return [
+            {name: value for name, value in zip(names, values) if value is not MISSING}
+            for values in zip(*columns)
+        ]
+
+    def take(self, rows) -> "RecordBatch":
+        rows = np.asarray(rows, dtype=np.int64)
+        return RecordBatch({name: _take(column, rows) for name, column in self.columns.items()}, len(rows))
+
+    def slice(self, start: int, end: int) -> "RecordBatch":
+        end = min(end, self.num_rows)
+        return RecordBatch({
+            name: column[start:end] if not isinstance(column, DictionaryColumn) else DictionaryColumn(column.codes[start:end], column.categories)
+            for name, column in self.columns.items()
+        }, max(end - start, 0))
+
+    def with_columns(self, **columns) -> "RecordBatch":
+        '''
+        Take columns by name
+        Return a new batch sharing the other columns with this one
+        '''
+        return RecordBatch({**self.columns, **columns}, self.num_rows)
+
+    def drop(self, *names: str) -> "RecordBatch":
+        return RecordBatch({name: column for name, column in self.columns.items() if name not in names}, self.num_rows)
+
+    def nbytes(self) -> int:
+        '''
+        Return an estimate of the memory held by the columns
+        '''
+        total = 0
+        for column in self.columns.values():
+            if isinstance(column, DictionaryColumn):
+                total += column.codes.nbytes + sum(sys.getsizeof(value) for value in column.categories)
+            elif isinstance(column, np.ndarray):
+                total += column.nbytes
+            else:
+                total += sys.getsizeof(column) + sum(sys.getsizeof(value) for value in column)
+        return total
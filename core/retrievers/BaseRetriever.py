@@ -22,4 +22,11 @@ class BaseRetriever(ABC):
         Take a query string
         Query vector store with embedded string and return list of dictionary objects
         '''
-        pass
\ No newline at end of file
+        pass
+
+    def retrieve_batch(self, queries: List[str]) -> List[List[Dict]]:
+        '''
+        Take a list of query strings
+        Return the retrieved documents for each query, in input order
+        '''
+        return [self.retrieve(query) for query in queries]
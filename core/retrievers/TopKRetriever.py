@@ -1,16 +1,41 @@
+from core.caches.QueryEmbeddingCache import QueryEmbeddingCache
 from core.retrievers.BaseRetriever import BaseRetriever
 
 class TopKRetriever(BaseRetriever):
     def __init__(self, embedder, vector_store, **kwargs):
         super().__init__(embedder, vector_store, **kwargs)
         self.k = self.config.get("top_k", 10)
+        # Repeated questions skip the embedding call; the cache is shared by every retriever in the process
+        self.query_cache = None
+        if self.config.get("query_cache_max_entries", 10000) > 0:
+            self.query_cache = QueryEmbeddingCache.shared(
+                max_entries=self.config.get("query_cache_max_entries", 10000),
+                ttl_seconds=self.config.get("query_cache_ttl_seconds", 3600),
+                persistent_path=self.config.get("query_cache_path", None),
+                persistent_max_entries=self.config.get("query_cache_path_max_entries", 200000)
+            )
+        self.model = getattr(self.embedder, "model", type(self.embedder).__name__)
+
+    def _docs_to_texts(self, query_docs):
+        return [doc["metadata"]["text"] for doc in query_docs]
+
+    def _embed_queries(self, queries):
+        if self.query_cache is None:
+            return self.embedder.embed_texts(queries)
+        return self.query_cache.get_or_embed(self.model, queries, self.embedder.embed_texts)
+
+    def query_cache_stats(self):
+        return self.query_cache.stats() if self.query_cache is not None else {}
 
     def retrieve(self, query):
-        return_docs = []
-        self.query_embedding = self.embedder.embed_text(query)
+        self.query_embedding = self._embed_queries([query])[0]
         query_docs = self.vector_store.query_top_k(self.query_embedding, self.k)
-        for doc in query_docs:
-            text = doc["metadata"]["text"]
-            return_docs.append(" ".join(text))
+        self.query_doc_ids = [doc["id"] for doc in query_docs]
+        return self._docs_to_texts(query_docs)
 
-        return return_docs
+    def retrieve_batch(self, queries):
+        # One batched embedding call for the uncached queries, then one batched search
+        self.query_embeddings = self._embed_queries(queries)
+        all_query_docs = self.vector_store.query_top_k_batch(self.query_embeddings, self.k)
+        self.query_doc_ids_batch = [[doc["id"] for doc in query_docs] for query_docs in all_query_docs]
+        return [self._docs_to_texts(query_docs) for query_docs in all_query_docs]
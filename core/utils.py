@@ -1,30 +1,74 @@
+from __future__ import annotations
+
 import yaml
 from dotenv import load_dotenv
+import importlib
 import os
 import json
-from typing import Dict, List
-
-from core.parsers.BaseParser import BaseParser
-from core.parsers.PdfParser import PdfParser
-from core.parsers.HtmlParser import HtmlParser
-from core.parsers.QACsvParser import QACsvParser
-from core.parsers.NotebookParser import NotebookParser
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
-from core.chunkers.BaseChunker import BaseChunker
-from core.chunkers.FixedTokenSizeChunker import FixedTokenSizeChunker
+if TYPE_CHECKING:
+    import numpy as np
+    from core.parsers.BaseParser import BaseParser
+    from core.chunkers.BaseChunker import BaseChunker
+    from core.deduplicators.BaseDeduplicator import BaseDeduplicator
+    from core.embedders.BaseEmbedder import BaseEmbedder
+    from core.vector_stores.BaseVectorStore import BaseVectorStore
+    from core.retrievers.BaseRetriever import BaseRetriever
+    from core.generators.BaseGenerator import BaseGenerator
 
-from core.embedders.BaseEmbedder import BaseEmbedder
-from core.embedders.OpenAIEmbedder import OpenAIEmbedder
+# Component classes by kind and YAML type, as "module:Class" so a class and its dependencies are only imported when requested
+COMPONENT_REGISTRY = {
+    "parser": {
+        "pdf": "core.parsers.PdfParser:PdfParser",
+        "html": "core.parsers.HtmlParser:HtmlParser",
+        "csv": "core.parsers.QACsvParser:QACsvParser",
+        "ipynb": "core.parsers.NotebookParser:NotebookParser",
+    },
+    "chunker": {
+        "FixedTokenSizeChunker": "core.chunkers.FixedTokenSizeChunker:FixedTokenSizeChunker",
+    },
+    "deduplicator": {
+        "MinHashDeduplicator": "core.deduplicators.MinHashDeduplicator:MinHashDeduplicator",
+    },
+    "embedder": {
+        "OpenAIEmbedder": "core.embedders.OpenAIEmbedder:OpenAIEmbedder",
+        "AsyncOpenAIEmbedder": "core.embedders.AsyncOpenAIEmbedder:AsyncOpenAIEmbedder",
+        "SentenceTransformerEmbedder": "core.embedders.SentenceTransformerEmbedder:SentenceTransformerEmbedder",
+    },
+    "vector_store": {
+        "PineconeVectorStore": "core.vector_stores.PineconeVectorStore:PineconeVectorStore",
+        "ChromaVectorStore": "core.vector_stores.ChromaVectorStore:ChromaVectorStore",
+        "NumpyVectorStore": "core.vector_stores.NumpyVectorStore:NumpyVectorStore",
+        "IVFVectorStore": "core.vector_stores.IVFVectorStore:IVFVectorStore",
+    },
+    "retriever": {
+        "TopKRetriever": "core.retrievers.TopKRetriever:TopKRetriever",
+    },
+    "generator": {
+        "OpenAIGenerator": "core.generators.OpenAIGenerator:OpenAIGenerator",
+    },
+}
 
-from core.vector_stores.BaseVectorStore import BaseVectorStore
-from core.vector_stores.ChromaVectorStore import ChromaVectorStore
-from core.vector_stores.PineconeVectorStore import PineconeVectorStore
-
-from core.retrievers.BaseRetriever import BaseRetriever
-from core.retrievers.TopKRetriever import TopKRetriever
+def register_component(kind: str, type: str, target: str) -> None:
+    '''
+    Take a component kind, a YAML type and a "module:Class" target
+    Register the target so initialize_* can build it by type
+    '''
+    COMPONENT_REGISTRY.setdefault(kind, {})[type] = target
 
-from core.generators.BaseGenerator import BaseGenerator
-from core.generators.OpenAIGenerator import OpenAIGenerator
+def resolve_component(kind: str, type: str):
+    '''
+    Take a component kind and a YAML type, either registered or a "module:Class" path
+    Return the component class, importing its module on first use, or None for an unknown type
+    '''
+    target = COMPONENT_REGISTRY.get(kind, {}).get(type)
+    if target is None and ":" in type:
+        target = type
+    if target is None:
+        return None
+    module_name, class_name = target.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
 
 def get_env_config(path: str) -> Dict:
     load_dotenv(path)
@@ -64,14 +108,9 @@ def initialize_parser(type: str, parser_config: Dict) -> BaseParser:
     Return a parser
     '''
     parser = None
-    if type == "pdf":
-        parser = PdfParser(**parser_config)
-    elif type == "html":
-        parser = HtmlParser(**parser_config)
-    elif type == "csv":
-        parser = QACsvParser(**parser_config)
-    elif type == "ipynb":
-        parser = NotebookParser(**parser_config)
+    parser_class = resolve_component("parser", type)
+    if parser_class is not None:
+        parser = parser_class(**parser_config)
 
     return parser
 
@@ -100,11 +139,26 @@ def initialize_chunker(chunker_config: Dict) -> BaseChunker:
     chunker = None
     config = chunker_config.get("config", {})
     type = chunker_config.get("type", "")
-    if type == "FixedTokenSizeChunker":
-        chunker = FixedTokenSizeChunker(**config)
+    chunker_class = resolve_component("chunker", type)
+    if chunker_class is not None:
+        chunker = chunker_class(**config)
 
     return chunker
 
+def initialize_deduplicator(deduplicator_config: Dict) -> BaseDeduplicator:
+    '''
+    Take deduplicator config
+    Return a deduplicator
+    '''
+    deduplicator = None
+    config = deduplicator_config.get("config", {})
+    type = deduplicator_config.get("type", "")
+    deduplicator_class = resolve_component("deduplicator", type)
+    if deduplicator_class is not None:
+        deduplicator = deduplicator_class(**config)
+
+    return deduplicator
+
 def initialize_embedder(embedder_config: Dict) -> BaseEmbedder:
     '''
     Take embedder config
@@ -113,8 +167,9 @@ def initialize_embedder(embedder_config: Dict) -> BaseEmbedder:
     embedder = None
     type = embedder_config.get("type", "")
     config = embedder_config.get("config", {})
-    if type == "OpenAIEmbedder":
-        embedder = OpenAIEmbedder(**config)
+    embedder_class = resolve_component("embedder", type)
+    if embedder_class is not None:
+        embedder = embedder_class(**config)
 
     return embedder
 
@@ -126,10 +181,9 @@ def initialize_vector_store(vector_store_config: Dict) -> BaseVectorStore:
     vector_store = None
     config = vector_store_config.get("config", {})
     type = vector_store_config.get("type", "")
-    if type == "PineconeVectorStore":
-        vector_store = PineconeVectorStore(**config)
-    elif type == "ChromaVectorStore":
-        vector_store = ChromaVectorStore(**config)
+    vector_store_class = resolve_component("vector_store", type)
+    if vector_store_class is not None:
+        vector_store = vector_store_class(**config)
 
     return vector_store
 
@@ -141,8 +195,9 @@ def initialize_retriever(embedder: BaseEmbedder, vector_store: BaseVectorStore,
     retriever = None
     config = retriever_config.get("config", {})
     type = retriever_config.get("type", "")
-    if type == "TopKRetriever":
-        retriever = TopKRetriever(embedder, vector_store, **config)
+    retriever_class = resolve_component("retriever", type)
+    if retriever_class is not None:
+        retriever = retriever_class(embedder, vector_store, **config)
 
     return retriever
 
@@ -156,21 +211,79 @@ def initialize_generator(system_prompt: str, prompt_template: str, generator_con
     type = generator_config.get("type", "")
     config["system_prompt"] = system_prompt
     config["prompt_template"] = prompt_template
-    if type == "OpenAIGenerator":
-        generator = OpenAIGenerator(**config)
+    generator_class = resolve_component("generator", type)
+    if generator_class is not None:
+        generator = generator_class(**config)
 
     return generator
 
 def check_for_embeddings(path: str) -> bool:
-    if os.path.exists(path):
-        return True
-    return False
+    if not os.path.exists(path):
+        return False
+    # Binary artifacts are only usable together with their metadata sidecar
+    if path.endswith(".npy") and not os.path.exists(_embeddings_metadata_path(path)):
+        return False
+    return True
+
+def _embeddings_metadata_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".jsonl"
 
 def save_embeddings(embeddings_list: List, output_path: str) -> None:
+    if output_path.endswith(".npy"):
+        return save_embeddings_binary(embeddings_list, output_path)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(embeddings_list, f, indent=4, ensure_ascii=False)
 
 def load_embeddings(path: str) -> List[Dict]:
+    if path.endswith(".npy"):
+        return load_embeddings_binary(path)
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+def save_embeddings_binary(embeddings_list: List, output_path: str) -> None:
+    '''
+    Take a list of chunks with embeddings and a .npy output path
+    Save the embeddings as one contiguous float32 matrix and the remaining fields as a JSONL sidecar keyed by row
+    '''
+    import numpy as np
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    matrix = np.asarray([item["embedding"] for item in embeddings_list], dtype=np.float32)
+    np.save(output_path, np.ascontiguousarray(matrix))
+    with open(_embeddings_metadata_path(output_path), "w", encoding="utf-8") as f:
+        for row, item in enumerate(embeddings_list):
+            metadata = {key: value for key, value in item.items() if key != "embedding"}
+            f.write(json.dumps({"row": row, **metadata}, ensure_ascii=False) + "\n")
+
+def load_embeddings_matrix(path: str) -> Tuple[np.ndarray, List[Dict]]:
+    '''
+    Take a .npy embeddings path
+    Return the memory-mapped float32 matrix and the list of row metadata
+    '''
+    import numpy as np
+    matrix = np.load(path, mmap_mode="r")
+    metadata = [None] * len(matrix)
+    with open(_embeddings_metadata_path(path), "r", encoding="utf-8") as f:
+        for line in f:
+            item = json.loads(line)
+            metadata[item.pop("row")] = item
+
+    return matrix, metadata
+
+def load_embeddings_binary(path: str) -> List[Dict]:
+    '''
+    Take a .npy embeddings path
+    Return chunks whose embedding is a row view into the memory-mapped matrix
+    '''
+    matrix, metadata = load_embeddings_matrix(path)
+    return [{**item, "embedding": matrix[row]} for row, item in enumerate(metadata)]
+
+def convert_json_embeddings(json_path: str, npy_path: str = None) -> str:
+    '''
+    Take a JSON embeddings file and an optional .npy output path
+    Write the binary artifact next to it and return its path
+    '''
+    if npy_path is None:
+        npy_path = os.path.splitext(json_path)[0] + ".npy"
+    save_embeddings_binary(load_embeddings(json_path), npy_path)
+    return npy_path
@@ -1,5 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import hashlib
+import random
+import threading
+import time
+
+import numpy as np
+
+from core.records.RecordBatch import RecordBatch
 
 class BaseVectorStore(ABC):
     '''
@@ -34,4 +43,135 @@ class BaseVectorStore(ABC):
         Take a query embedding
         Return a list of dictionary objects of retrieved documents
         '''
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def list_ids(self, file_names: Optional[List[str]] = None) -> List[str]:
+        '''
+        Take an optional list of file names
+        Return the ids stored for those files, or every stored id
+        '''
+        pass
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        '''
+        Take a list of ids
+        Remove them from vector store
+        '''
+        pass
+
+    @staticmethod
+    def file_id_prefix(file_name: str) -> str:
+        '''
+        Take a file name
+        Return the prefix shared by the ids of all its chunks
+        '''
+        return hashlib.sha256(file_name.encode("utf-8")).hexdigest()[:16] + "#"
+
+    @classmethod
+    def chunk_id(cls, item: Dict) -> str:
+        '''
+        Take a chunk dictionary
+        Return an id derived from its file name, marker, sub_marker and text, stable across runs
+        '''
+        text_hash = hashlib.sha256(item['text'].encode("utf-8")).hexdigest()
+        location = f"{item['file_name']}|{item['marker']}|{item['sub_marker']}|{text_hash}"
+        return cls.file_id_prefix(item['file_name']) + hashlib.sha256(location.encode("utf-8")).hexdigest()[:32]
+
+    def sync(self, data: List[Dict], batch_size: int, file_names: Optional[List[str]] = None) -> Dict:
+        '''
+        Take the current list of chunks with embeddings, and optionally the files they cover
+        Upsert only chunks whose id is not stored yet and delete stored ids no longer present
+        Without file_names the whole store is diffed, with them only the chunks of those files
+        Return counts of upserted, deleted and unchanged chunks
+        '''
+        current = {self.chunk_id(item): item for item in data}
+        indexed = set(self.list_ids(file_names))
+        to_upsert = [item for id, item in current.items() if id not in indexed]
+        to_delete = [id for id in indexed if id not in current]
+
+        # An unchanged corpus makes no write calls at all
+        if to_upsert:
+            self.store_batch(to_upsert, batch_size)
+        if to_delete:
+            self.delete(to_delete)
+
+        return {
+            "upserted": len(to_upsert),
+            "deleted": len(to_delete),
+            "unchanged": len(current) - len(to_upsert),
+        }
+
+    def query_top_k_batch(self, query_embeddings: List[List[float]], k: int) -> List[List[Dict]]:
+        '''
+        Take a list of query embeddings
+        Return a list of retrieved documents per query, in input order
+        '''
+        return [self.query_top_k(query_embedding, k) for query_embedding in query_embeddings]
+
+    def store_matrix(self, embeddings: np.ndarray, metadata: List[Dict], batch_size: int):
+        '''
+        Take a (possibly memory-mapped) embedding matrix and per-row metadata
+        Store in vector store in batches, passing rows through as array views
+        '''
+        data = [{**item, "embedding": embeddings[row]} for row, item in enumerate(metadata)]
+        self.store_batch(data, batch_size)
+
+    def store_columnar(self, batch: RecordBatch, batch_size: int):
+        '''
+        Take a columnar batch of chunks with an embedding column
+        Store in vector store in batches, only building per-row metadata dicts for one batch at a time
+        '''
+        for start in range(0, len(batch), batch_size):
+            block = batch.slice(start, start + batch_size)
+            self.store_matrix(block["embedding"], block.drop("embedding").to_records(), batch_size)
+
+    def _write_batches(self, num_items: int, batch_size: int, prepare_batch: Callable[[int, int], Any], write_batch: Callable[[Any], None]):
+        '''
+        Take the number of items, a batch size, a function preparing the items in [start, end) and a function writing a prepared batch
+        Write all batches with a pool of num_writers concurrent writers, retrying failed writes with exponential backoff
+        '''
+        num_writers = self.config.get("num_writers", 4)
+        max_retries = self.config.get("max_retries", 5)
+        base_backoff = self.config.get("base_backoff", 1.0)
+        bounds = [(start, min(start + batch_size, num_items)) for start in range(0, num_items, batch_size)]
+        progress = {"items": 0, "batches": 0, "retries": 0, "next_report": 0.1}
+        lock = threading.Lock()
+        start_time = time.perf_counter()
+
+        def run(start, end):
+            # Prepared once, so every retry resends the same ids
+            batch = prepare_batch(start, end)
+            for attempt in range(max_retries + 1):
+                try:
+                    write_batch(batch)
+                    break
+                except Exception as e:
+                    if attempt == max_retries:
+                        raise
+                    with lock:
+                        progress["retries"] += 1
+                    delay = min(60.0, base_backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+                    print(f"Batch [{start}, {end}) failed ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+            with lock:
+                progress["items"] += end - start
+                progress["batches"] += 1
+                if progress["items"] >= progress["next_report"] * num_items:
+                    elapsed = time.perf_counter() - start_time
+                    print(f"Stored {progress['items']}/{num_items} items ({progress['items'] / elapsed:.0f} items/s)")
+                    while progress["next_report"] * num_items <= progress["items"]:
+                        progress["next_report"] += 0.1
+
+        with ThreadPoolExecutor(max_workers=num_writers) as executor:
+            futures = [executor.submit(run, start, end) for start, end in bounds]
+            for future in futures:
+                future.result()
+
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"Stored {num_items} items in {len(bounds)} batches with {num_writers} writers "
+            f"in {elapsed:.1f}s ({num_items / max(elapsed, 1e-9):.0f} items/s, {progress['retries']} retries)"
+        )
@@ -1,7 +1,7 @@
 from core.vector_stores.BaseVectorStore import BaseVectorStore
 import chromadb
+import numpy as np
 import os
-import uuid
 
 class ChromaVectorStore(BaseVectorStore):
     def __init__(self, **kwargs):
@@ -23,7 +23,7 @@ class ChromaVectorStore(BaseVectorStore):
     def _prepare_data_for_upsert(self, data):
         prepared_data = []
         for item in data:
-            embedding = list(item['embedding'])  # Ensure embedding is in list format
+            embedding = item['embedding']  # Chroma accepts lists and NumPy rows alike
             # Prepare the metadata dictionary with the relevant columns
             metadata = {
                 "file_type": item['file_type'],
@@ -34,7 +34,7 @@ class ChromaVectorStore(BaseVectorStore):
                 "text": item['text']
             }
             prepared_data.append({
-                'id': str(uuid.uuid4()),
+                'id': self.chunk_id(item),
                 'values': embedding,
                 'metadata': metadata
             })
@@ -43,15 +43,50 @@ class ChromaVectorStore(BaseVectorStore):
 
     def store(self, data):
         self.prepared_data = self._prepare_data_for_upsert(data)
-        self.collection.add(
+        self.collection.upsert(
             ids=[d["id"] for d in self.prepared_data],
             embeddings=[d["values"] for d in self.prepared_data],
             metadatas=[d["metadata"] for d in self.prepared_data],
         )
         return 
     
+    def _max_batch_size(self, batch_size):
+        # Chroma rejects writes larger than its own max batch size
+        return min(batch_size, self.client.get_max_batch_size())
+
+    def _upsert(self, batch):
+        # Upsert rather than add, so a retried batch cannot duplicate rows
+        self.collection.upsert(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            metadatas=batch["metadatas"],
+        )
+
     def store_batch(self, data, batch_size):
-        self.store(data)
+        def prepare_batch(start, end):
+            prepared_data = self._prepare_data_for_upsert(data[start:end])
+            return {
+                "ids": [d["id"] for d in prepared_data],
+                "embeddings": [d["values"] for d in prepared_data],
+                "metadatas": [d["metadata"] for d in prepared_data],
+            }
+
+        self._write_batches(len(data), self._max_batch_size(batch_size), prepare_batch, self._upsert)
+        return
+
+    def store_matrix(self, embeddings, metadata, batch_size):
+        # Hand matrix slices straight to Chroma instead of building per-row lists
+        def prepare_batch(start, end):
+            prepared_data = self._prepare_data_for_upsert(
+                [{**item, "embedding": None} for item in metadata[start:end]]
+            )
+            return {
+                "ids": [d["id"] for d in prepared_data],
+                "embeddings": np.asarray(embeddings[start:end], dtype=np.float32),
+                "metadatas": [d["metadata"] for d in prepared_data],
+            }
+
+        self._write_batches(len(metadata), self._max_batch_size(batch_size), prepare_batch, self._upsert)
         return
     
     def query_top_k(self, query_embedding, k):
@@ -63,10 +98,54 @@ class ChromaVectorStore(BaseVectorStore):
 
         self.query_docs = [
             {
+                "id": id,
                 "metadata": metadata,
                 "score": 1 - distance
             }
-            for metadata, distance in zip(results["metadatas"][0], results["distances"][0])
+            for id, metadata, distance in zip(results["ids"][0], results["metadatas"][0], results["distances"][0])
         ]
 
-        return self.query_docs
\ No newline at end of file
+        return self.query_docs
+
+    def query_top_k_batch(self, query_embeddings, k):
+        # One multi-query call instead of one round trip per query
+        results = self.collection.query(
+            query_embeddings=[list(query_embedding) for query_embedding in query_embeddings],
+            n_results=k,
+            include=["metadatas", "distances"]
+        )
+
+        return [
+            [
+                {
+                    "id": id,
+                    "metadata": metadata,
+                    "score": 1 - distance
+                }
+                for id, metadata, distance in zip(ids, metadatas, distances)
+            ]
+            for ids, metadatas, distances in zip(results["ids"], results["metadatas"], results["distances"])
+        ]
+
+    def list_ids(self, file_names=None):
+        # None means every file; an empty list means none, and Chroma rejects an empty $in filter
+        where = None
+        if file_names is not None:
+            file_names = list(file_names)
+            if not file_names:
+                return []
+            where = {"file_name": {"$in": file_names}}
+        ids = []
+        # Page through the collection so large stores are not fetched in one call
+        page_size = self.client.get_max_batch_size()
+        while True:
+            page = self.collection.get(where=where, include=[], limit=page_size, offset=len(ids))["ids"]
+            ids.extend(page)
+            if len(page) < page_size:
+                return ids
+
+    def delete(self, ids):
+        page_size = self.client.get_max_batch_size()
+        for i in range(0, len(ids), page_size):
+            self.collection.delete(ids=ids[i:i + page_size])
+        return
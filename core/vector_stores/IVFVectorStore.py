@@ -0,0 +1,135 @@
+from core.vector_stores.NumpyVectorStore import NumpyVectorStore
+import numpy as np
+import os
+
+class IVFVectorStore(NumpyVectorStore):
+    '''
+    Inverted-file approximate nearest neighbour store
+    A spherical k-means coarse quantizer splits rows into nlist lists and queries only scan the nprobe closest lists
+    Until enough rows exist to train the quantizer, queries fall back to the exact flat search
+    '''
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.nlist = self.config.get("nlist", 1024)
+        self.nprobe = self.config.get("nprobe", 16)
+        self.train_threshold = self.config.get("train_threshold", 40 * self.nlist)
+        self.train_sample_size = self.config.get("train_sample_size", 100000)
+        self.kmeans_iterations = self.config.get("kmeans_iterations", 20)
+        self.seed = self.config.get("seed", 0)
+        self.centroids = None
+        self.lists = []
+        self._list_arrays = {}
+
+        if self.persist_directory:
+            self.centroids_path = os.path.join(self.persist_directory, "centroids.npy")
+            self.assignments_path = os.path.join(self.persist_directory, "assignments.i32")
+            if os.path.exists(self.centroids_path) and os.path.exists(self.assignments_path):
+                self.centroids = np.load(self.centroids_path)
+                assignments = np.fromfile(self.assignments_path, dtype=np.int32)
+                if len(assignments) == self.count:
+                    self._build_lists(assignments)
+                else:
+                    # Assignments are out of step with the rows, so re-derive them from the centroids
+                    self._build_lists(self._assign(self.matrix))
+                    self._save_assignments(self._all_assignments(), append=False)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def _assign(self, rows):
+        '''
+        Take a block of normalized rows
+        Return the index of the closest centroid for each row
+        '''
+        assignments = np.empty(len(rows), dtype=np.int32)
+        for i in range(0, len(rows), 65536):
+            block = np.asarray(rows[i:i + 65536], dtype=np.float32)
+            assignments[i:i + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def _build_lists(self, assignments):
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]].tolist() for c in range(len(self.centroids))]
+        self._list_arrays = {}
+
+    def _all_assignments(self):
+        assignments = np.empty(self.count, dtype=np.int32)
+        for c, rows in enumerate(self.lists):
+            assignments[rows] = c
+        return assignments
+
+    def _save_assignments(self, assignments, append):
+        if self.persist_directory:
+            with open(self.assignments_path, "ab" if append else "wb") as f:
+                f.write(np.ascontiguousarray(assignments, dtype=np.int32).tobytes())
+
+    def train(self):
+        '''
+        Train the coarse quantizer with spherical k-means on a sample of the stored rows
+        Then assign every stored row to its list
+        '''
+        rng = np.random.default_rng(self.seed)
+        sample_ids = np.sort(rng.choice(self.count, size=min(self.count, self.train_sample_size), replace=False))
+        sample = np.asarray(self.matrix[sample_ids], dtype=np.float32)
+        nlist = min(self.nlist, len(sample))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            self.centroids = centroids
+            labels = self._assign(sample)
+            order = np.argsort(labels, kind="stable")
+            sorted_labels = labels[order]
+            starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+            # Empty clusters keep their previous centroid
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            centroids = centroids.copy()
+            centroids[sorted_labels[starts]] = self._normalize(sums)
+
+        self.centroids = centroids
+        assignments = self._assign(self.matrix)
+        self._build_lists(assignments)
+        if self.persist_directory:
+            np.save(self.centroids_path, self.centroids)
+            self._save_assignments(assignments, append=False)
+
+    def _append(self, embeddings, metadata, ids):
+        start = self.count
+        super()._append(embeddings, metadata, ids)
+        if self.is_trained:
+            # Incremental insert: new rows join their nearest existing list
+            assignments = self._assign(self.matrix[start:self.count])
+            for offset, c in enumerate(assignments):
+                self.lists[c].append(start + offset)
+                self._list_arrays.pop(int(c), None)
+            self._save_assignments(assignments, append=True)
+        elif self.count >= self.train_threshold:
+            self.train()
+
+    def _list_array(self, c):
+        if c not in self._list_arrays:
+            self._list_arrays[c] = np.asarray(self.lists[c], dtype=np.int64)
+        return self._list_arrays[c]
+
+    def query_top_k(self, query_embedding, k, nprobe=None):
+        if not self.is_trained:
+            return super().query_top_k(query_embedding, k)
+
+        query = self._normalize(query_embedding)
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        # Sorted candidates read the memory-mapped rows in file order
+        candidates = np.sort(np.concatenate([self._list_array(int(c)) for c in probe]))
+        rows, scores = self._search(query, k, candidates)
+
+        self.query_docs = self._make_docs(rows, scores)
+        return self.query_docs
+
+    def query_top_k_batch(self, query_embeddings, k):
+        if not self.is_trained:
+            return super().query_top_k_batch(query_embeddings, k)
+        # Each query probes its own lists, so there is no shared product to batch
+        return [self.query_top_k(query_embedding, k) for query_embedding in query_embeddings]
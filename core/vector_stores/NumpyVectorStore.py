@@ -0,0 +1,351 @@
+from core.vector_stores.BaseVectorStore import BaseVectorStore
+from core.vector_stores.Quantizers import make_quantizer
+import numpy as np
+import json
+import os
+
+class NumpyVectorStore(BaseVectorStore):
+    '''
+    In-process flat vector store over a pre-normalized float32 matrix
+    Rows are appended to a raw float32 file and memory-mapped back, metadata goes to a JSONL file
+    Deleted or overwritten rows are tombstoned rather than rewritten
+    With quantization configured, searches scan compact in-memory codes and re-rank a shortlist from the full precision rows
+    '''
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.embedding_dim = self.config.get("embedding_dim", 1536)
+        self.persist_directory = self.config.get("persist_directory", None)
+        self.count = 0
+        self.metadata = []
+        self.ids = []
+        self.row_by_id = {}
+        self.deleted_rows = set()
+        self._deleted_array = None
+        self._matrix = np.empty((0, self.embedding_dim), dtype=np.float32)
+
+        self.quantization = self.config.get("quantization", None)
+        self.quantizer = make_quantizer(self.quantization, **(
+            {"num_subspaces": self.config.get("pq_subspaces", 96)} if self.quantization == "pq" else {}
+        ))
+        # Stores smaller than this are searched exactly; int8 scales and PQ codebooks are then fit on a real sample
+        # An int8 scale is widened and every row re-encoded when later rows exceed it, rather than clipping them
+        self.quantization_train_threshold = self.config.get("quantization_train_threshold", 10000)
+        self.rerank_k = self.config.get("rerank_k", 100)
+        self._codes = None
+
+        if self.persist_directory:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            self.embeddings_path = os.path.join(self.persist_directory, "embeddings.f32")
+            self.metadata_path = os.path.join(self.persist_directory, "metadata.jsonl")
+            self.deleted_path = os.path.join(self.persist_directory, "deleted.jsonl")
+            if os.path.exists(self.embeddings_path) and os.path.exists(self.metadata_path):
+                row_bytes = self.embedding_dim * np.dtype(np.float32).itemsize
+                line_ends = self._read_metadata()
+                # Rows need both their metadata line and their full embedding, either can be cut short by a crash mid-append
+                self.count = min(len(self.ids), os.path.getsize(self.embeddings_path) // row_bytes)
+                del self.ids[self.count:]
+                del self.metadata[self.count:]
+                metadata_bytes = line_ends[self.count - 1] if self.count else 0
+                if os.path.getsize(self.metadata_path) > metadata_bytes:
+                    os.truncate(self.metadata_path, metadata_bytes)
+                # Later rows win for a repeated id, earlier ones were tombstoned when it was overwritten
+                self.row_by_id = {id: row for row, id in enumerate(self.ids)}
+                if os.path.exists(self.deleted_path):
+                    with open(self.deleted_path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                rows = json.loads(line)
+                            except ValueError:
+                                # A torn last tombstone line; those rows were never reported as deleted
+                                break
+                            self.deleted_rows.update(row for row in rows if row < self.count)
+                    for row in self.deleted_rows:
+                        if self.row_by_id.get(self.ids[row]) == row:
+                            del self.row_by_id[self.ids[row]]
+                # Drop rows, or a partial row, whose metadata never made it to disk (e.g. an interrupted append)
+                if os.path.getsize(self.embeddings_path) > self.count * row_bytes:
+                    os.truncate(self.embeddings_path, self.count * row_bytes)
+                self._map_matrix()
+
+            self.quantizer_path = os.path.join(self.persist_directory, "quantizer.npz")
+            if self.quantizer is not None:
+                if os.path.exists(self.quantizer_path):
+                    with np.load(self.quantizer_path) as state:
+                        self.quantizer.load_state(dict(state))
+                # Codes are cheap to rebuild from the memory-mapped rows, so only the quantizer itself is persisted
+                if self.quantizer.is_trained and self.count:
+                    self._encode_all()
+
+    def _read_metadata(self):
+        '''
+        Load ids and metadata from metadata.jsonl, stopping at a torn last line
+        Return the byte offset at which each complete line ends
+        '''
+        line_ends = []
+        offset = 0
+        with open(self.metadata_path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    if f.read().strip():
+                        raise ValueError(f"Corrupt metadata line {len(line_ends) + 1} in {self.metadata_path}")
+                    print(f"Ignoring incomplete last metadata line in {self.metadata_path}")
+                    break
+                offset += len(line)
+                line_ends.append(offset)
+                self.ids.append(record["id"])
+                self.metadata.append(record["metadata"])
+        return line_ends
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:self.count]
+
+    def _map_matrix(self):
+        if self.count:
+            self._matrix = np.memmap(self.embeddings_path, dtype=np.float32, mode="r", shape=(self.count, self.embedding_dim))
+
+    @staticmethod
+    def _normalize(embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1, norms)
+
+    def _tombstone(self, rows):
+        rows = [int(row) for row in rows if row not in self.deleted_rows]
+        if not rows:
+            return
+        self.deleted_rows.update(rows)
+        self._deleted_array = None
+        if self.persist_directory:
+            with open(self.deleted_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rows) + "\n")
+
+    def _deleted(self):
+        if self._deleted_array is None and self.deleted_rows:
+            self._deleted_array = np.fromiter(sorted(self.deleted_rows), dtype=np.int64)
+        return self._deleted_array
+
+    def _append(self, embeddings, metadata, ids):
+        '''
+        Take a block of embeddings, their metadata and ids
+        Append them without rewriting the existing rows, tombstoning earlier rows with the same id
+        '''
+        rows = np.ascontiguousarray(self._normalize(embeddings).reshape(-1, self.embedding_dim))
+        start = self.count
+        if self.persist_directory:
+            with open(self.embeddings_path, "ab") as f:
+                f.write(rows.tobytes())
+            with open(self.metadata_path, "a", encoding="utf-8") as f:
+                for id, item in zip(ids, metadata):
+                    f.write(json.dumps({"id": id, "metadata": item}, ensure_ascii=False) + "\n")
+            self.count += len(rows)
+            self._map_matrix()
+        else:
+            # Grow capacity geometrically so appends stay amortized O(rows)
+            if self.count + len(rows) > len(self._matrix):
+                capacity = max(self.count + len(rows), 2 * len(self._matrix), 1024)
+                grown = np.empty((capacity, self.embedding_dim), dtype=np.float32)
+                grown[:self.count] = self._matrix[:self.count]
+                self._matrix = grown
+            self._matrix[self.count:self.count + len(rows)] = rows
+            self.count += len(rows)
+        self.ids.extend(ids)
+        self.metadata.extend(metadata)
+        overwritten = []
+        for row, id in enumerate(ids, start):
+            if id in self.row_by_id:
+                overwritten.append(self.row_by_id[id])
+            self.row_by_id[id] = row
+        self._tombstone(overwritten)
+
+        if self.quantizer is not None:
+            if self.quantizer.is_trained:
+                if self.quantizer.widen(rows):
+                    self._save_quantizer()
+                    self._encode_all()
+                else:
+                    self._append_codes(self.quantizer.encode(rows))
+            elif self.count >= self.quantization_train_threshold:
+                self.train_quantizer()
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self.count]
+
+    def _append_codes(self, codes):
+        start = self.count - len(codes)
+        if self._codes is None or self.count > len(self._codes):
+            grown = np.empty((max(self.count, 2 * start, 1024), *codes.shape[1:]), dtype=codes.dtype)
+            if self._codes is not None:
+                grown[:start] = self._codes[:start]
+            self._codes = grown
+        self._codes[start:self.count] = codes
+
+    def _encode_all(self):
+        self._codes = None
+        encoded = 0
+        for i in range(0, self.count, 65536):
+            block = self.quantizer.encode(self.matrix[i:i + 65536])
+            encoded += len(block)
+            if self._codes is None:
+                self._codes = np.empty((self.count, *block.shape[1:]), dtype=block.dtype)
+            self._codes[i:encoded] = block
+
+    def train_quantizer(self):
+        '''
+        Fit the quantizer on a sample of the stored rows and encode every row
+        '''
+        rng = np.random.default_rng(0)
+        sample_ids = np.sort(rng.choice(self.count, size=min(self.count, 50000), replace=False))
+        self.quantizer.train(self.matrix[sample_ids])
+        # Rows outside the sample may still exceed an int8 scale fit on it
+        for i in range(0, self.count, 65536):
+            self.quantizer.widen(self.matrix[i:i + 65536])
+        self._save_quantizer()
+        self._encode_all()
+
+    def _save_quantizer(self):
+        if self.persist_directory:
+            np.savez(self.quantizer_path, **self.quantizer.state())
+
+    def memory_usage(self) -> dict:
+        '''
+        Return the bytes taken by full precision rows and by quantized codes
+        '''
+        return {
+            "float32_bytes": self.count * self.embedding_dim * np.dtype(np.float32).itemsize,
+            "codes_bytes": self.codes.nbytes if self._codes is not None else 0,
+        }
+
+    def _prepare_metadata(self, item):
+        return {
+            "file_type": item['file_type'],
+            "file_name": item['file_name'],
+            "marker": str(item['marker']),
+            "sub_marker": str(item['sub_marker']),
+            "first_10_tokens": item['first_10_tokens'],
+            "text": item['text']
+        }
+
+    def store(self, data):
+        if not data:
+            return
+        self._append(
+            [item['embedding'] for item in data],
+            [self._prepare_metadata(item) for item in data],
+            [self.chunk_id(item) for item in data]
+        )
+        return
+
+    def store_batch(self, data, batch_size):
+        for i in range(0, len(data), batch_size):
+            self.store(data[i:i + batch_size])
+        return
+
+    def store_matrix(self, embeddings, metadata, batch_size):
+        # Normalize block by block so a memory-mapped matrix is never fully materialized
+        for i in range(0, len(metadata), batch_size):
+            self._append(
+                embeddings[i:i + batch_size],
+                [self._prepare_metadata(item) for item in metadata[i:i + batch_size]],
+                [self.chunk_id(item) for item in metadata[i:i + batch_size]]
+            )
+        return
+
+    @staticmethod
+    def _top_k(scores, k):
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _search(self, query, k, rows=None):
+        '''
+        Take a normalized query, k and optionally a sorted array of candidate row ids
+        Return the row ids and scores of the top k live rows
+        '''
+        deleted = self._deleted()
+        if deleted is not None and rows is not None:
+            rows = rows[~np.isin(rows, deleted, assume_unique=True)]
+
+        if self._codes is not None:
+            # Asymmetric distance computation over the codes, then an exact re-rank of the shortlist
+            scores = self.quantizer.scores(self.codes if rows is None else self.codes[rows], query)
+            if deleted is not None and rows is None:
+                scores[deleted] = -np.inf
+            if not self.rerank_k:
+                top = self._top_k(scores, k)
+                return self._live_top(top if rows is None else rows[top], scores[top])
+            shortlist = self._top_k(scores, max(k, self.rerank_k))
+            shortlist = shortlist[np.isfinite(scores[shortlist])]
+            rows = np.sort(shortlist if rows is None else rows[shortlist])
+
+        if rows is None:
+            scores = self.matrix @ query
+            if deleted is not None:
+                scores[deleted] = -np.inf
+            top = self._top_k(scores, k)
+            return self._live_top(top, scores[top])
+        scores = np.asarray(self.matrix[rows], dtype=np.float32) @ query
+        top = self._top_k(scores, k)
+        return rows[top], scores[top]
+
+    @staticmethod
+    def _live_top(rows, scores):
+        # Tombstoned rows score -inf and only surface when k exceeds the live row count
+        live = np.isfinite(scores)
+        return rows[live], scores[live]
+
+    def _make_docs(self, rows, scores):
+        return [
+            {
+                "id": self.ids[row],
+                "metadata": self.metadata[row],
+                "score": float(score)
+            } for row, score in zip(rows, scores)
+        ]
+
+    def query_top_k(self, query_embedding, k):
+        if self.count == 0:
+            return []
+        rows, scores = self._search(self._normalize(query_embedding), k)
+
+        self.query_docs = self._make_docs(rows, scores)
+        return self.query_docs
+
+    def query_top_k_batch(self, query_embeddings, k):
+        if self.count == 0:
+            return [[] for _ in query_embeddings]
+        queries = self._normalize(query_embeddings).reshape(-1, self.embedding_dim)
+        if self._codes is not None:
+            return [self.query_top_k(query, k) for query in queries]
+
+        # One matrix-matrix product per block of queries, with blocks sized to keep the score matrix around 64 MiB
+        block_size = max(1, 2 ** 24 // self.count)
+        deleted = self._deleted()
+        results = []
+        for i in range(0, len(queries), block_size):
+            block_scores = queries[i:i + block_size] @ self.matrix.T
+            if deleted is not None:
+                block_scores[:, deleted] = -np.inf
+            for scores in block_scores:
+                top = self._top_k(scores, k)
+                results.append(self._make_docs(*self._live_top(top, scores[top])))
+
+        return results
+
+    def list_ids(self, file_names=None):
+        if file_names is None:
+            return list(self.row_by_id)
+        file_names = set(file_names)
+        return [id for id, row in self.row_by_id.items() if self.metadata[row]["file_name"] in file_names]
+
+    def delete(self, ids):
+        self._tombstone([self.row_by_id.pop(id) for id in ids if id in self.row_by_id])
+        return
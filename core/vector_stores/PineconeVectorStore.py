@@ -1,6 +1,6 @@
 from core.vector_stores.BaseVectorStore import BaseVectorStore
 from pinecone import Pinecone, ServerlessSpec
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 class PineconeVectorStore(BaseVectorStore):
     def __init__(self, **kwargs):
@@ -21,11 +21,14 @@ class PineconeVectorStore(BaseVectorStore):
                 )
             )
         self.index = self.client.Index(self.index_name)
+        self.query_workers = self.config.get("query_workers", 8)
     
     def _prepare_data_for_upsert(self, data):
         prepared_data = []
         for item in data:
-            embedding = list(item['embedding'])  # Ensure embedding is in list format
+            embedding = item['embedding']
+            # Ensure embedding is in list format, NumPy rows from binary artifacts included
+            embedding = embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
             # Prepare the metadata dictionary with the relevant columns
             metadata = {
                 "file_type": item['file_type'],
@@ -36,7 +39,7 @@ class PineconeVectorStore(BaseVectorStore):
                 "text": item['text']
             }
             prepared_data.append({
-                'id': str(uuid.uuid4()),
+                'id': self.chunk_id(item),
                 'values': embedding,
                 'metadata': metadata
             })
@@ -49,25 +52,50 @@ class PineconeVectorStore(BaseVectorStore):
         return 
     
     def store_batch(self, data, batch_size):
-        self.prepared_data = self._prepare_data_for_upsert(data)
-        for i in range(0, len(self.prepared_data), batch_size):
-            batch = self.prepared_data[i:i + batch_size]
-            self.index.upsert(vectors=batch)
+        # Prepare one batch at a time so memory-mapped embeddings are only turned into lists as they are sent
+        self._write_batches(
+            len(data),
+            batch_size,
+            lambda start, end: self._prepare_data_for_upsert(data[start:end]),
+            lambda batch: self.index.upsert(vectors=batch)
+        )
         return
     
-    def query_top_k(self, query_embedding, k):
+    def _query(self, query_embedding, k):
         results = self.index.query(
             vector=query_embedding,
             top_k=k,
             include_metadata=True,
             include_values=False
         )
-
-        self.query_docs = [
+        return [
             {
+                "id": match["id"],
                 "metadata": match["metadata"],
                 "score": match["score"]
             } for match in results["matches"]
         ]
 
-        return self.query_docs
\ No newline at end of file
+    def query_top_k(self, query_embedding, k):
+        self.query_docs = self._query(query_embedding, k)
+        return self.query_docs
+
+    def query_top_k_batch(self, query_embeddings, k):
+        # Pinecone has no multi-vector query, so issue the queries concurrently; map keeps input order
+        with ThreadPoolExecutor(max_workers=self.query_workers) as executor:
+            return list(executor.map(lambda query_embedding: self._query(query_embedding, k), query_embeddings))
+
+    def list_ids(self, file_names=None):
+        # Chunk ids start with a per-file prefix, so Pinecone's prefix listing finds a file's chunks directly
+        prefixes = [self.file_id_prefix(file_name) for file_name in file_names] if file_names is not None else [None]
+        ids = []
+        for prefix in prefixes:
+            for page in self.index.list(prefix=prefix) if prefix else self.index.list():
+                ids.extend(page)
+        return ids
+
+    def delete(self, ids):
+        # Pinecone caps deletes at 1000 ids per request
+        for i in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[i:i + 1000])
+        return
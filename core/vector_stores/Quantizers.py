@@ -0,0 +1,144 @@
+import numpy as np
+
+class ScalarQuantizer:
+    '''
+    Scalar quantizer storing each dimension as float16, or as int8 with a per-dimension scale
+    '''
+
+    def __init__(self, dtype: str = "int8"):
+        self.dtype = dtype
+        self.scale = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.dtype == "float16" or self.scale is not None
+
+    def train(self, rows: np.ndarray):
+        if self.dtype == "int8":
+            max_abs = np.abs(np.asarray(rows, dtype=np.float32)).max(axis=0)
+            self.scale = np.where(max_abs == 0, 1, max_abs / 127).astype(np.float32)
+
+    def widen(self, rows: np.ndarray) -> bool:
+        '''
+        Take rows to be encoded
+        Grow the int8 scale of any dimension they exceed, so they are not clipped to +-127
+        Return whether the scale changed, in which case existing codes must be re-encoded
+        '''
+        if self.dtype != "int8" or self.scale is None or len(rows) == 0:
+            return False
+        needed = np.abs(np.asarray(rows, dtype=np.float32)).max(axis=0) / 127
+        if not (needed > self.scale).any():
+            return False
+        self.scale = np.maximum(self.scale, needed).astype(np.float32)
+        return True
+
+    def encode(self, rows: np.ndarray) -> np.ndarray:
+        rows = np.asarray(rows, dtype=np.float32)
+        if self.dtype == "float16":
+            return rows.astype(np.float16)
+        return np.clip(np.rint(rows / self.scale), -127, 127).astype(np.int8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        '''
+        Take codes and a full precision query
+        Return approximate inner products (asymmetric distance computation)
+        '''
+        # Fold the int8 scale into the query instead of decoding every row
+        query = query if self.dtype == "float16" else query * self.scale
+        scores = np.empty(len(codes), dtype=np.float32)
+        for i in range(0, len(codes), 65536):
+            scores[i:i + 65536] = codes[i:i + 65536].astype(np.float32) @ query
+        return scores
+
+    def state(self) -> dict:
+        return {"scale": self.scale} if self.scale is not None else {}
+
+    def load_state(self, state: dict):
+        self.scale = state.get("scale")
+
+
+class ProductQuantizer:
+    '''
+    Product quantizer splitting vectors into num_subspaces sub-vectors, each coded by one of 256 k-means centroids
+    '''
+
+    def __init__(self, num_subspaces: int = 96, kmeans_iterations: int = 15, seed: int = 0):
+        self.num_subspaces = num_subspaces
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.codebooks = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    def _split(self, rows):
+        rows = np.asarray(rows, dtype=np.float32)
+        return rows.reshape(len(rows), self.num_subspaces, -1)
+
+    @staticmethod
+    def _nearest(sub_rows, codebook):
+        # argmin ||x - c||^2 = argmin (||c||^2 - 2 x.c)
+        return np.argmin((codebook ** 2).sum(axis=1) - 2 * sub_rows @ codebook.T, axis=1)
+
+    def train(self, rows: np.ndarray):
+        rng = np.random.default_rng(self.seed)
+        sub_rows = self._split(rows)
+        num_centroids = min(256, len(sub_rows))
+        codebooks = []
+        for j in range(self.num_subspaces):
+            data = sub_rows[:, j, :]
+            codebook = data[rng.choice(len(data), size=num_centroids, replace=False)].copy()
+            for _ in range(self.kmeans_iterations):
+                labels = self._nearest(data, codebook)
+                counts = np.bincount(labels, minlength=num_centroids)
+                sums = np.stack([
+                    np.bincount(labels, weights=data[:, d], minlength=num_centroids)
+                    for d in range(data.shape[1])
+                ], axis=1)
+                # Empty centroids keep their previous position
+                filled = counts > 0
+                codebook[filled] = sums[filled] / counts[filled, None]
+            codebooks.append(codebook)
+        self.codebooks = np.stack(codebooks)
+
+    def encode(self, rows: np.ndarray) -> np.ndarray:
+        sub_rows = self._split(rows)
+        codes = np.empty((len(sub_rows), self.num_subspaces), dtype=np.uint8)
+        for j in range(self.num_subspaces):
+            codes[:, j] = self._nearest(sub_rows[:, j, :], self.codebooks[j])
+        return codes
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        '''
+        Take codes and a full precision query
+        Return approximate inner products from per-subspace lookup tables (asymmetric distance computation)
+        '''
+        lookup = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.num_subspaces, -1))
+        subspaces = np.arange(self.num_subspaces)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for i in range(0, len(codes), 65536):
+            scores[i:i + 65536] = lookup[subspaces, codes[i:i + 65536]].sum(axis=1)
+        return scores
+
+    def widen(self, rows: np.ndarray) -> bool:
+        # Every row maps to its nearest centroids, so new rows never fall outside the codebooks
+        return False
+
+    def state(self) -> dict:
+        return {"codebooks": self.codebooks} if self.codebooks is not None else {}
+
+    def load_state(self, state: dict):
+        self.codebooks = state.get("codebooks")
+
+
+def make_quantizer(kind: str, **kwargs):
+    '''
+    Take a quantization kind (float16, int8 or pq) and its options
+    Return a quantizer, or None when quantization is disabled
+    '''
+    if kind in ("float16", "int8"):
+        return ScalarQuantizer(kind)
+    elif kind == "pq":
+        return ProductQuantizer(**kwargs)
+    return None
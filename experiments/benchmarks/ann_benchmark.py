@@ -0,0 +1,91 @@
+'''
+Recall-vs-latency benchmark of IVFVectorStore against exact NumpyVectorStore search
+
+Usage:
+    python -m experiments.benchmarks.ann_benchmark --num-rows 200000 --dim 256
+    python -m experiments.benchmarks.ann_benchmark --embeddings data/output/embeddings/text-embedding-ada-002-full.npy
+'''
+import argparse
+import time
+
+import numpy as np
+
+from core.utils import load_embeddings_matrix
+from core.vector_stores.NumpyVectorStore import NumpyVectorStore
+from core.vector_stores.IVFVectorStore import IVFVectorStore
+
+
+def synthetic_embeddings(num_rows, dim, num_clusters, seed):
+    # Clustered data resembles real embeddings far better than isotropic noise
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_clusters, dim))
+    labels = rng.integers(0, num_clusters, num_rows)
+    return (centers[labels] + 2.0 * rng.normal(size=(num_rows, dim))).astype(np.float32)
+
+
+def make_queries(matrix, num_queries, seed):
+    # Perturbed copies of stored rows, so every query has meaningful neighbours
+    rng = np.random.default_rng(seed)
+    rows = np.asarray(matrix[np.sort(rng.choice(len(matrix), num_queries, replace=False))], dtype=np.float32)
+    noise = rng.normal(size=rows.shape).astype(np.float32)
+    return rows + 0.1 * np.linalg.norm(rows, axis=1, keepdims=True) * noise / np.sqrt(rows.shape[1])
+
+
+def run_queries(store, queries, k, **kwargs):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([doc["metadata"]["marker"] for doc in store.query_top_k(query, k, **kwargs)])
+    latency_ms = (time.perf_counter() - start) / len(queries) * 1000
+    return results, latency_ms
+
+
+def recall_at_k(exact, approximate):
+    return np.mean([len(set(e) & set(a)) / len(e) for e, a in zip(exact, approximate)])
+
+
+def benchmark(name, matrix, num_queries, k, nlist, nprobes, seed):
+    metadata = [
+        {"file_type": "bench", "file_name": name, "marker": row, "sub_marker": 0, "first_10_tokens": "", "text": ""}
+        for row in range(len(matrix))
+    ]
+    dim = matrix.shape[1]
+    queries = make_queries(matrix, num_queries, seed)
+
+    flat = NumpyVectorStore(embedding_dim=dim)
+    flat.store_matrix(matrix, metadata, 65536)
+    exact, exact_latency = run_queries(flat, queries, k)
+    print(f"[{name}] {len(matrix)} rows x {dim} dims, exact search: {exact_latency:.3f} ms/query")
+
+    ivf = IVFVectorStore(embedding_dim=dim, nlist=nlist, train_threshold=len(matrix) + 1, seed=seed)
+    ivf.store_matrix(matrix, metadata, 65536)
+    start = time.perf_counter()
+    ivf.train()
+    print(f"[{name}] IVF training with nlist={len(ivf.centroids)}: {time.perf_counter() - start:.1f} s")
+
+    for nprobe in nprobes:
+        approximate, latency = run_queries(ivf, queries, k, nprobe=nprobe)
+        print(f"[{name}] nprobe={nprobe:4d}  recall@{k}={recall_at_k(exact, approximate):.4f}  {latency:.3f} ms/query  ({exact_latency / latency:.1f}x)")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--num-rows", type=int, default=200000)
+    arg_parser.add_argument("--dim", type=int, default=256)
+    arg_parser.add_argument("--num-clusters", type=int, default=500)
+    arg_parser.add_argument("--embeddings", type=str, default=None, help="Binary .npy embeddings artifact of real chunks")
+    arg_parser.add_argument("--num-queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--nlist", type=int, default=None)
+    arg_parser.add_argument("--nprobes", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    datasets = [("synthetic", synthetic_embeddings(args.num_rows, args.dim, args.num_clusters, args.seed))]
+    if args.embeddings:
+        datasets.append(("real", load_embeddings_matrix(args.embeddings)[0]))
+
+    for name, matrix in datasets:
+        # Rule of thumb: about sqrt(N) lists
+        nlist = args.nlist or max(1, int(np.sqrt(len(matrix))))
+        benchmark(name, matrix, min(args.num_queries, len(matrix)), args.k, nlist, args.nprobes, args.seed)
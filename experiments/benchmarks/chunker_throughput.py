@@ -0,0 +1,57 @@
+'''
+Chunking throughput of FixedTokenSizeChunker on the parsed PDF corpus, in-process and with a worker pool
+Pages are parsed once up front so only chunking is timed
+
+Usage:
+    python -m experiments.benchmarks.chunker_throughput --data data/input/full --max-tokens 512 --overlap 50 --num-workers 4
+'''
+import argparse
+import time
+from pathlib import Path
+
+from core.chunkers.FixedTokenSizeChunker import FixedTokenSizeChunker
+from core.parsers.PdfParser import PdfParser
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--data", type=str, default="data/input/full")
+    arg_parser.add_argument("--max-tokens", type=int, default=512)
+    arg_parser.add_argument("--overlap", type=int, default=50)
+    arg_parser.add_argument("--repeats", type=int, default=3)
+    arg_parser.add_argument("--num-workers", type=int, default=4)
+    arg_parser.add_argument("--mp-context", type=str, default="spawn")
+    args = arg_parser.parse_args()
+
+    parser = PdfParser()
+    pages = []
+    for path in sorted(Path(args.data).rglob("*.pdf")):
+        pages.extend(parser.parse(str(path)))
+    num_bytes = sum(len(page["text"].encode("utf-8")) for page in pages)
+    print(f"{len(pages)} pages, {num_bytes / 2**20:.2f} MiB of text")
+
+    results = {}
+    for num_workers in [1, args.num_workers]:
+        chunker = FixedTokenSizeChunker(
+            max_tokens=args.max_tokens,
+            overlap=args.overlap,
+            num_workers=num_workers,
+            parallel_threshold=1,
+            mp_context=args.mp_context
+        )
+        # Build the token length table, and start the pool, outside the timed runs
+        chunker.chunk(pages[:num_workers])
+
+        best = float("inf")
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            chunks = chunker.chunk(pages)
+            best = min(best, time.perf_counter() - start)
+        chunker.close()
+        results[num_workers] = chunks
+        print(f"{num_workers} worker(s): {len(chunks)} chunks in {best:.3f}s, {len(pages) / best:.0f} pages/s, {num_bytes / 2**20 / best:.2f} MiB/s")
+    print(f"parallel output identical to serial: {results[1] == results[args.num_workers]}")
+
+    token_counts = [len(tokens) for tokens in chunker.tokenizer.encode_ordinary_batch([chunk["text"] for chunk in chunks])]
+    over_limit = sum(count > args.max_tokens for count in token_counts)
+    print(f"tokens per chunk: max {max(token_counts, default=0)}, mean {sum(token_counts) / max(len(token_counts), 1):.1f}, "
+          f"{over_limit} chunk(s) over {args.max_tokens}")
@@ -0,0 +1,56 @@
+'''
+Memory and time of chunking sentence-level records as a list of dicts versus as a columnar RecordBatch
+Records mimic HtmlParser output: one short record per sentence, file-level strings repeated on each
+
+Usage:
+    python -m experiments.benchmarks.columnar_memory --num-files 200 --sentences-per-file 2000
+'''
+import argparse
+import gc
+import time
+import tracemalloc
+
+from core.chunkers.FixedTokenSizeChunker import FixedTokenSizeChunker
+from core.records.RecordBatch import RecordBatch
+
+
+def measure(name, build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:10s} {len(result):9d} chunks  {elapsed:7.2f}s  retained {current / 2**20:8.1f} MiB  peak {peak / 2**20:8.1f} MiB")
+    return result
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--num-files", type=int, default=200)
+    arg_parser.add_argument("--sentences-per-file", type=int, default=2000)
+    arg_parser.add_argument("--max-tokens", type=int, default=512)
+    arg_parser.add_argument("--overlap", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    records = [
+        {
+            "file_type": "html",
+            "file_name": f"data/input/full/references/page_{file}.html",
+            "text": f"Sentence {sentence} of page {file} about smoothing, backoff and interpolation in n-gram models.",
+            "marker": sentence
+        }
+        for file in range(args.num_files) for sentence in range(args.sentences_per_file)
+    ]
+    chunker = FixedTokenSizeChunker(max_tokens=args.max_tokens, overlap=args.overlap)
+    # Build the token length table outside the measured runs
+    chunker.chunk(records[:1])
+
+    batch = RecordBatch.from_records(records)
+    print(f"{len(records)} records: RecordBatch columns take about {batch.nbytes() / 2**20:.1f} MiB")
+
+    dict_chunks = measure("dicts", lambda: chunker.chunk(records))
+    del dict_chunks
+    batch_chunks = measure("columnar", lambda: chunker.chunk_columnar(batch))
+    print(f"identical output: {batch_chunks.to_records() == chunker.chunk(records)}")
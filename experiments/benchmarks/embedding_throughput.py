@@ -0,0 +1,82 @@
+'''
+Compare serial batched embedding against the concurrent async engine on the local fake server
+The server runs in its own process so that it does not share the client's interpreter and event loop
+
+Usage:
+    python -m experiments.benchmarks.embedding_throughput --num-texts 2000 --latency 0.2 --max-in-flight 4
+'''
+import argparse
+import json
+import subprocess
+import sys
+import time
+import urllib.request
+
+from core.embedders.OpenAIEmbedder import OpenAIEmbedder
+from core.embedders.AsyncOpenAIEmbedder import AsyncOpenAIEmbedder
+
+
+def server_stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+        return json.load(response)
+
+
+def wait_for_server(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return server_stats(port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--num-texts", type=int, default=2000)
+    arg_parser.add_argument("--batch-size", type=int, default=64)
+    arg_parser.add_argument("--max-concurrency", type=int, default=8)
+    arg_parser.add_argument("--latency", type=float, default=0.2)
+    arg_parser.add_argument("--max-in-flight", type=int, default=4)
+    arg_parser.add_argument("--error-rate", type=float, default=0.05)
+    arg_parser.add_argument("--port", type=int, default=8765)
+    args = arg_parser.parse_args()
+
+    server = subprocess.Popen([
+        sys.executable, "-m", "experiments.benchmarks.fake_openai_server",
+        "--port", str(args.port), "--latency", str(args.latency),
+        "--max-in-flight", str(args.max_in_flight), "--error-rate", str(args.error_rate)
+    ], stdout=subprocess.DEVNULL)
+    try:
+        wait_for_server(args.port)
+        print(
+            f"Fake server: latency {args.latency}s, max in flight {args.max_in_flight}, error rate {args.error_rate}; "
+            f"client: batch size {args.batch_size}, max concurrency {args.max_concurrency}"
+        )
+
+        texts = [f"Chunk number {i} about n-gram smoothing and word vectors" for i in range(args.num_texts)]
+        config = {
+            "api_key": "fake",
+            "base_url": f"http://127.0.0.1:{args.port}/v1",
+            "batch_size": args.batch_size,
+            "max_concurrency": args.max_concurrency,
+            "base_backoff": 0.05,
+        }
+
+        throughputs = {}
+        for embedder_class in [OpenAIEmbedder, AsyncOpenAIEmbedder]:
+            embedder = embedder_class(**config)
+            before = server_stats(args.port)
+            start = time.perf_counter()
+            embeddings = embedder.embed_texts(texts)
+            elapsed = time.perf_counter() - start
+            assert all(embedding is not None for embedding in embeddings)
+            stats = {key: value - before[key] for key, value in server_stats(args.port).items()}
+            throughputs[embedder_class.__name__] = len(texts) / elapsed
+            print(f"{embedder_class.__name__}: {len(texts) / elapsed:.1f} texts/s ({elapsed:.2f}s), server stats: {stats}")
+
+        print(f"Speedup: {throughputs['AsyncOpenAIEmbedder'] / throughputs['OpenAIEmbedder']:.2f}x")
+    finally:
+        server.terminate()
+        server.wait()
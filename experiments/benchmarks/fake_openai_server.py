@@ -0,0 +1,130 @@
+'''
+Local stand-in for the OpenAI embeddings endpoint
+Simulates request latency, 429 throttling above a concurrency limit and random 5xx errors
+
+Usage:
+    python experiments/benchmarks/fake_openai_server.py --port 8000 --latency 0.2 --max-in-flight 4
+Then point an embedder at it with base_url: http://127.0.0.1:8000/v1 in the embedder YAML
+GET /stats returns the request, throttle, error and input counters so far
+'''
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def fake_embedding(text, dim, encoding_format="float"):
+    # Deterministic pseudo-embedding so repeated runs can be compared, drawn with numpy so the server is not CPU-bound
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).uniform(-1, 1, dim).astype(np.float32)
+    # The openai client asks for base64 float32 by default, as the real API returns it
+    if encoding_format == "base64":
+        return base64.b64encode(vector.tobytes()).decode("ascii")
+    return vector.tolist()
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenAI/0.1"
+
+    def log_message(self, format, *args):
+        return
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/stats":
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        with self.server.lock:
+            stats = dict(self.server.stats)
+        self._send_json(200, stats)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        with server.lock:
+            server.stats["requests"] += 1
+            if server.in_flight >= server.max_in_flight:
+                server.stats["throttled"] += 1
+                throttled = True
+            else:
+                server.in_flight += 1
+                throttled = False
+
+        if throttled:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}, {"retry-after": str(server.retry_after)})
+            return
+
+        try:
+            time.sleep(server.latency)
+            if random.random() < server.error_rate:
+                with server.lock:
+                    server.stats["errors"] += 1
+                self._send_json(500, {"error": {"message": "Simulated server error", "type": "server_error"}})
+                return
+
+            inputs = request.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            data = [
+                {"object": "embedding", "index": idx, "embedding": fake_embedding(text, server.dim, request.get("encoding_format", "float"))}
+                for idx, text in enumerate(inputs)
+            ]
+            with server.lock:
+                server.stats["inputs"] += len(inputs)
+            self._send_json(200, {
+                "object": "list",
+                "data": data,
+                "model": request.get("model", ""),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}
+            })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+def make_server(port=8000, latency=0.2, max_in_flight=4, error_rate=0.0, retry_after=0.1, dim=1536):
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeEmbeddingsHandler)
+    server.latency = latency
+    server.max_in_flight = max_in_flight
+    server.error_rate = error_rate
+    server.retry_after = retry_after
+    server.dim = dim
+    server.in_flight = 0
+    server.lock = threading.Lock()
+    server.stats = {"requests": 0, "throttled": 0, "errors": 0, "inputs": 0}
+    return server
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--port", type=int, default=8000)
+    arg_parser.add_argument("--latency", type=float, default=0.2)
+    arg_parser.add_argument("--max-in-flight", type=int, default=4)
+    arg_parser.add_argument("--error-rate", type=float, default=0.0)
+    arg_parser.add_argument("--retry-after", type=float, default=0.1)
+    arg_parser.add_argument("--dim", type=int, default=1536)
+    args = arg_parser.parse_args()
+
+    server = make_server(args.port, args.latency, args.max_in_flight, args.error_rate, args.retry_after, args.dim)
+    print(f"Serving fake embeddings on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stats: {server.stats}")
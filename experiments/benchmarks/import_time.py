@@ -0,0 +1,73 @@
+'''
+Startup cost of importing core modules, measured in a fresh interpreter with python -X importtime
+Each target runs in its own subprocess so nothing is shared between measurements; the heaviest top-level imports are listed per target
+
+Usage:
+    python -m experiments.benchmarks.import_time --repeat 5 --top 8
+    python -m experiments.benchmarks.import_time --targets core.utils core.parsers.HtmlParser
+'''
+import argparse
+import statistics
+import subprocess
+import sys
+
+DEFAULT_TARGETS = [
+    "core.utils",
+    "core.pipelines.StreamingPipeline",
+    "core.retrievers.TopKRetriever",
+    "core.embedders.OpenAIEmbedder",
+    "core.parsers.HtmlParser",
+    "core.parsers.QACsvParser",
+    "core.vector_stores.NumpyVectorStore",
+    "core.vector_stores.ChromaVectorStore",
+]
+
+
+def import_times(target):
+    '''
+    Take a module name
+    Return the cumulative milliseconds of importing it in a fresh interpreter and of each third-party package it pulls in, or None if the import failed
+    '''
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+
+    total = 0.0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        milliseconds = int(cumulative) / 1000
+        if name == target:
+            total = milliseconds
+        # A package's outermost import line carries its whole cost, so keep the largest cumulative per root package
+        root = name.split(".")[0]
+        if root != "core" and root not in sys.stdlib_module_names and not root.startswith("_"):
+            packages[root] = max(packages.get(root, 0.0), milliseconds)
+    return total, packages
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--targets", type=str, nargs="+", default=DEFAULT_TARGETS)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    for target in args.targets:
+        runs = [import_times(target) for _ in range(args.repeat)]
+        if any(run is None for run in runs):
+            print(f"{target:40s} import failed (missing optional dependency?)")
+            continue
+        totals = [total for total, _ in runs]
+        print(f"{target:40s} median {statistics.median(totals):8.1f} ms  min {min(totals):8.1f} ms  over {args.repeat} runs")
+
+        # Heaviest packages pulled in by the last run
+        _, packages = runs[-1]
+        for name, milliseconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"    {name:36s} {milliseconds:8.1f} ms")
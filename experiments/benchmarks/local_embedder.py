@@ -0,0 +1,49 @@
+'''
+Throughput of SentenceTransformerEmbedder on chunk texts with 1 and several CPU worker processes, and single-query latency on the warm model
+Chunk texts come from a JSON or .npy embeddings artifact; the model is read from a local directory
+
+Usage:
+    python -m experiments.benchmarks.local_embedder --embeddings data/output/embeddings/base.npy --model-path data/models/all-MiniLM-L6-v2 --num-texts 5000 --num-workers 4
+'''
+import argparse
+import statistics
+import time
+
+from core.embedders.SentenceTransformerEmbedder import SentenceTransformerEmbedder
+from core.utils import load_embeddings
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--embeddings", type=str, required=True)
+    arg_parser.add_argument("--model-path", type=str, default="data/models/all-MiniLM-L6-v2")
+    arg_parser.add_argument("--num-texts", type=int, default=5000)
+    arg_parser.add_argument("--num-workers", type=int, default=4)
+    arg_parser.add_argument("--batch-size", type=int, default=64)
+    arg_parser.add_argument("--num-queries", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    texts = [item["text"] for item in load_embeddings(args.embeddings)[:args.num_texts]]
+    print(f"{len(texts)} chunk texts from {args.embeddings}")
+
+    for num_workers in [1, args.num_workers]:
+        embedder = SentenceTransformerEmbedder(
+            model_path=args.model_path, batch_size=args.batch_size,
+            num_workers=num_workers, parallel_threshold=1
+        )
+        if num_workers > 1:
+            # Start the pool and load the model in every worker outside the measured run
+            embedder.embed_texts(texts[:num_workers * 2])
+        start = time.perf_counter()
+        embedder.embed_texts(texts)
+        elapsed = time.perf_counter() - start
+        print(f"{num_workers} worker(s): {len(texts) / elapsed:8.1f} texts/s")
+
+        if num_workers == 1:
+            latencies = []
+            for query in texts[:args.num_queries]:
+                start = time.perf_counter()
+                embedder.embed_text(query)
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(f"single query: median {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms")
+        embedder.close()
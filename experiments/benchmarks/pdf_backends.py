@@ -0,0 +1,50 @@
+'''
+Pages per second of the PdfParser backends, and of page-parallel extraction on the largest document
+
+Usage:
+    python -m experiments.benchmarks.pdf_backends --data data/input/full/lectures --page-workers 4
+'''
+import argparse
+import time
+from pathlib import Path
+
+from core.parsers.PdfParser import PdfParser
+
+
+def pages_per_second(parser, paths):
+    start = time.perf_counter()
+    num_pages = 0
+    num_chars = 0
+    for path in paths:
+        for record in parser.iter_parse(path):
+            num_pages += 1
+            num_chars += len(record["text"])
+    elapsed = time.perf_counter() - start
+    return num_pages, num_chars, elapsed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--data", type=str, default="data/input/full/lectures")
+    arg_parser.add_argument("--backends", type=str, nargs="+", default=["pypdf", "pymupdf"])
+    arg_parser.add_argument("--page-workers", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    paths = [str(path) for path in sorted(Path(args.data).rglob("*.pdf"))]
+    largest = max(paths, key=lambda path: Path(path).stat().st_size)
+    print(f"{len(paths)} PDFs in {args.data}, largest {largest}")
+
+    for backend in args.backends:
+        try:
+            parser = PdfParser(backend=backend)
+            num_pages, num_chars, elapsed = pages_per_second(parser, paths)
+        except ImportError as e:
+            print(f"{backend:8s} unavailable ({e})")
+            continue
+        print(f"{backend:8s} {num_pages} pages, {num_chars} chars in {elapsed:.2f}s: {num_pages / elapsed:.1f} pages/s")
+
+        # Page ranges of one document spread over processes, against the same document read serially
+        for page_workers in [1, args.page_workers]:
+            parser = PdfParser(backend=backend, page_workers=page_workers, parallel_page_threshold=1)
+            num_pages, _, elapsed = pages_per_second(parser, [largest])
+            print(f"         largest document, {page_workers} page worker(s): {num_pages / elapsed:.1f} pages/s")
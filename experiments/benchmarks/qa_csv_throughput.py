@@ -0,0 +1,62 @@
+'''
+Rows per second of QACsvParser against the previous iterrows implementation on data/input/full/qas
+The QA files are small, so their rows are also tiled into a larger temporary CSV to show how each approach scales
+
+Usage:
+    python -m experiments.benchmarks.qa_csv_throughput --data data/input/full/qas --tile 20000 --chunksize 10000
+'''
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from core.parsers.QACsvParser import QACsvParser
+
+
+def parse_iterrows(path):
+    # The row-by-row implementation QACsvParser used before
+    frame = pd.read_csv(path, skiprows=1, names=["info", "question", "answer"])
+    frame["info"] = frame["info"].fillna("No extra information given")
+    data = []
+    for index, row in frame.iterrows():
+        text = f"Info: {row['info']}\nQuestion: {row['question']}\nAnswer: {row['answer']}"
+        data.append({
+            "file_type": "csv",
+            "file_name": path,
+            "marker": index+1,
+            "sub_marker": index+1,
+            "text": text,
+            "first_10_words": " ".join(text.split()[:10])
+        })
+    return data
+
+
+def measure(name, paths, parse):
+    start = time.perf_counter()
+    num_rows = sum(sum(1 for _ in parse(path)) for path in paths)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:22s} {num_rows:8d} rows in {elapsed:7.3f}s: {num_rows / elapsed:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--data", type=str, default="data/input/full/qas")
+    arg_parser.add_argument("--tile", type=int, default=20000, help="Copies of the QA rows in the large CSV")
+    arg_parser.add_argument("--chunksize", type=int, default=10000)
+    args = arg_parser.parse_args()
+
+    paths = [str(path) for path in sorted(Path(args.data).glob("*.csv"))]
+    frames = [pd.read_csv(path) for path in paths]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tiled_path = os.path.join(tmp_dir, "tiled.csv")
+        pd.concat(frames * args.tile, ignore_index=True).to_csv(tiled_path, index=False)
+
+        for name, inputs in [(f"{len(paths)} QA files", paths), ("tiled CSV", [tiled_path])]:
+            print(name)
+            measure("iterrows", inputs, parse_iterrows)
+            measure("vectorized", inputs, QACsvParser().parse)
+            measure(f"chunksize={args.chunksize}", inputs, QACsvParser(chunksize=args.chunksize).iter_parse)
@@ -0,0 +1,89 @@
+'''
+Memory savings and recall@k deltas of quantized NumpyVectorStore search against exact float32 search
+Queries are the questions in data/input/full/ground_truths/ground_truth_retrieval.json
+
+Usage:
+    python -m experiments.benchmarks.quantization_benchmark base data/output/embeddings/text-embedding-ada-002-full.npy
+'''
+import argparse
+import json
+import os
+
+import numpy as np
+
+from core.utils import (
+    load_config_yaml,
+    initialize_embedder,
+    get_env_config,
+    load_embeddings_matrix
+)
+from core.vector_stores.NumpyVectorStore import NumpyVectorStore
+
+
+def reference_hit_rate(results, ground_truth):
+    # A question counts as a hit when any retrieved chunk comes from one of its reference files
+    hits = 0
+    for docs, item in zip(results, ground_truth):
+        retrieved_files = {os.path.basename(doc["metadata"]["file_name"]) for doc in docs}
+        hits += bool(retrieved_files & set(item["references"]))
+    return hits / len(ground_truth)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("experiment", type=str)
+    arg_parser.add_argument("embeddings", type=str, help="Binary .npy embeddings artifact of the full corpus")
+    arg_parser.add_argument("--ground-truth", type=str, default="data/input/full/ground_truths/ground_truth_retrieval.json")
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--pq-subspaces", type=int, default=96)
+    arg_parser.add_argument("--rerank-k", type=int, default=100)
+    args = arg_parser.parse_args()
+
+    env_config = get_env_config(".env")
+    embedder_config = load_config_yaml(f"experiments/configs/{args.experiment}", "embedder")
+    embedder_config["config"]["api_key"] = env_config.get(embedder_config["config"].get("api_key", ""), "")
+    embedder = initialize_embedder(embedder_config)
+
+    with open(args.ground_truth, "r", encoding="utf-8") as f:
+        ground_truth = json.load(f)
+    query_embeddings = embedder.embed_texts([item["question"] for item in ground_truth])
+
+    matrix, metadata = load_embeddings_matrix(args.embeddings)
+    dim = matrix.shape[1]
+
+    exact_store = NumpyVectorStore(embedding_dim=dim)
+    exact_store.store_matrix(matrix, metadata, 65536)
+    exact_results = [exact_store.query_top_k(query, args.k) for query in query_embeddings]
+    exact_rows = [{doc["metadata"]["text"] for doc in docs} for docs in exact_results]
+    exact_hit_rate = reference_hit_rate(exact_results, ground_truth)
+    float32_bytes = exact_store.memory_usage()["float32_bytes"]
+    print(f"{len(matrix)} rows x {dim} dims, {len(ground_truth)} queries, k={args.k}")
+    print(f"float32        {float32_bytes / 2**20:9.2f} MiB  reference hit@{args.k}={exact_hit_rate:.3f}")
+
+    variants = []
+    for quantization in ["float16", "int8", "pq"]:
+        for rerank_k in [0, args.rerank_k]:
+            variants.append((quantization, rerank_k))
+
+    for quantization, rerank_k in variants:
+        store = NumpyVectorStore(
+            embedding_dim=dim,
+            quantization=quantization,
+            pq_subspaces=args.pq_subspaces,
+            quantization_train_threshold=len(matrix),
+            rerank_k=rerank_k
+        )
+        store.store_matrix(matrix, metadata, 65536)
+        results = [store.query_top_k(query, args.k) for query in query_embeddings]
+        recall = np.mean([
+            len(expected & {doc["metadata"]["text"] for doc in docs}) / max(len(expected), 1)
+            for expected, docs in zip(exact_rows, results)
+        ])
+        codes_bytes = store.memory_usage()["codes_bytes"]
+        hit_rate = reference_hit_rate(results, ground_truth)
+        name = f"{quantization}{'+rerank' if rerank_k else ''}"
+        print(
+            f"{name:14s} {codes_bytes / 2**20:9.2f} MiB ({float32_bytes / codes_bytes:5.1f}x smaller)  "
+            f"recall@{args.k} vs exact={recall:.3f} (delta {recall - 1:+.3f})  "
+            f"reference hit@{args.k}={hit_rate:.3f} (delta {hit_rate - exact_hit_rate:+.3f})"
+        )
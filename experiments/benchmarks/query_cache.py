@@ -0,0 +1,67 @@
+'''
+Hit rate and saved embedding latency of the query-embedding cache when replaying the benchmark questions
+Questions are drawn with a skew towards popular ones and a share are re-asked with different case and spacing; the embedder sleeps to simulate API latency
+
+Usage:
+    python -m experiments.benchmarks.query_cache --questions data/input/full/ground_truths/ground_truth_retrieval.json --num-queries 2000 --latency-ms 150
+'''
+import argparse
+import json
+import random
+import time
+
+from core.caches.QueryEmbeddingCache import QueryEmbeddingCache
+
+
+class SleepingEmbedder:
+    model = "simulated"
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def embed_texts(self, texts):
+        self.calls += 1
+        time.sleep(self.latency)
+        return [[float(len(text))] for text in texts]
+
+
+def rephrase(question, rng):
+    # Same question typed differently
+    if rng.random() < 0.5:
+        question = question.lower()
+    return "  " + question.replace(" ", "  ", 1) + " "
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--questions", type=str, default="data/input/full/ground_truths/ground_truth_retrieval.json")
+    arg_parser.add_argument("--num-queries", type=int, default=2000)
+    arg_parser.add_argument("--latency-ms", type=float, default=150)
+    arg_parser.add_argument("--rephrase", type=float, default=0.3, help="Share of queries re-asked with different case and spacing")
+    arg_parser.add_argument("--ttl-seconds", type=float, default=3600)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)]
+    rng = random.Random(args.seed)
+    # Zipf-like popularity: a few questions are asked far more often than the rest
+    weights = [1 / (rank + 1) for rank in range(len(questions))]
+    queries = [
+        rephrase(question, rng) if rng.random() < args.rephrase else question
+        for question in rng.choices(questions, weights=weights, k=args.num_queries)
+    ]
+
+    embedder = SleepingEmbedder(args.latency_ms / 1000)
+    cache = QueryEmbeddingCache(max_entries=10000, ttl_seconds=args.ttl_seconds)
+    start = time.perf_counter()
+    for query in queries:
+        cache.get_or_embed(embedder.model, [query], embedder.embed_texts)
+    elapsed = time.perf_counter() - start
+
+    stats = cache.stats()
+    uncached = args.num_queries * args.latency_ms / 1000
+    print(f"{args.num_queries} queries over {len(questions)} questions, {embedder.calls} embedding calls")
+    print(f"hit rate {stats['hit_rate']:.1%}, saved {stats['saved_seconds']:.1f}s of embedding latency")
+    print(f"wall time {elapsed:.1f}s against {uncached:.1f}s without the cache")
@@ -0,0 +1,12 @@
+import sys
+
+from core.utils import convert_json_embeddings
+
+if __name__=="__main__":
+    # Usage: python -m experiments.convert_embeddings <embeddings.json> [<embeddings.npy>]
+    json_path = sys.argv[1]
+    npy_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    print(f"Converting {json_path}")
+    npy_path = convert_json_embeddings(json_path, npy_path)
+    print(f"Saved binary embeddings to {npy_path}")
@@ -1,15 +1,17 @@
+import os
 import sys
-from pathlib import Path
 
+from core.checkpoints.IngestionCheckpoint import IngestionCheckpoint
+from core.pipelines.ParallelIngestionPipeline import ParallelIngestionPipeline
 from core.utils import (
     load_config_yaml,
     initialize_all_parsers,
     initialize_chunker,
+    initialize_deduplicator,
     initialize_embedder,
     initialize_vector_store,
     initialize_retriever,
     initialize_generator,
-    parser_router,
     get_env_config,
     read_prompt,
     check_for_embeddings,
@@ -29,6 +31,7 @@ if __name__=="__main__":
     experiment_config = load_config_yaml(configs_base_dir, "experiment")
     parsers_config = load_config_yaml(configs_base_dir, "parsers")
     chunker_config = load_config_yaml(configs_base_dir, "chunker")
+    deduplicator_config = load_config_yaml(configs_base_dir, "deduplicator")
     embedder_config = load_config_yaml(configs_base_dir, "embedder")
     vector_store_config = load_config_yaml(configs_base_dir, "vector_store")
     retriever_config = load_config_yaml(configs_base_dir, "retriever")
@@ -40,6 +43,9 @@ if __name__=="__main__":
     # Initialize chunker
     chunker = initialize_chunker(chunker_config)
 
+    # Initialize deduplicator
+    deduplicator = initialize_deduplicator(deduplicator_config)
+
     # Initialize embedder
     embedder_config["config"]["api_key"] = env_config.get(embedder_config["config"].get("api_key", ""), "")
     embedder = initialize_embedder(embedder_config)
@@ -60,33 +66,33 @@ if __name__=="__main__":
     generator_config["config"]["api_key"] = env_config.get(generator_config["config"].get("api_key", ""), "")
     generator = initialize_generator(system_prompt, prompt_template, generator_config)
 
-    # Check to see if database insertion logged
-    if not experiment_config.get("vector_store_exists", False):
-        print(f"Vector store does not exist")
-        # Check to see if embeddings exist already
-        if not check_for_embeddings(experiment_config["embeddings_dir"]):
-            print(f"Embeddings not found")
-            # Loop over data files
-            embeddings_to_save = []
-            data_path = Path(experiment_config["data"])
-            for file_path in data_path.rglob("*"):
-                if file_path.is_file():
-                    file_path = str(file_path)
-                    print(f"Working on: {file_path}")
-                    parser = parser_router(all_parsers, file_path)
-                    parsed_document = parser.parse(file_path)
-                    print(f"Finished parsing")
-                    print(f"Starting chunking")
-                    chunks = chunker.chunk(parsed_document)
-                    print(f"Finished chunking")
-                    print(f"Starting embedding")
-                    embeddings = embedder.embed_data(chunks)
-                    embeddings_to_save += [embedding for embedding in embeddings]
-                    print(f"Finished embedding")
-                    
-            
+    # Check to see if database insertion logged, or if the store should be synced with the corpus
+    sync_vector_store = experiment_config.get("sync_vector_store", False)
+    if not experiment_config.get("vector_store_exists", False) or sync_vector_store:
+        if not experiment_config.get("vector_store_exists", False):
+            print(f"Vector store does not exist")
+        # A sync has to see edited, added and removed files, so it always re-ingests the corpus; the parse, chunk and embedding caches keep unchanged files cheap
+        # Otherwise saved embeddings are reused when they exist
+        if sync_vector_store or not check_for_embeddings(experiment_config["embeddings_dir"]):
+            print(f"Re-ingesting corpus for sync" if sync_vector_store else f"Embeddings not found")
+            # Parse and chunk files in parallel, embed in this process
+            pipeline = ParallelIngestionPipeline(
+                all_parsers, chunker, embedder, vector_store, retriever, generator,
+                parsers_config=parsers_config,
+                chunker_config=chunker_config,
+                deduplicator=deduplicator,
+                num_workers=experiment_config.get("num_workers")
+            )
+            # Embedded chunks are logged as they are produced, so a crashed run resumes instead of starting over
+            checkpoint_dir = experiment_config.get("checkpoint_dir") or os.path.splitext(experiment_config["embeddings_dir"])[0] + ".checkpoint"
+            checkpoint = IngestionCheckpoint(checkpoint_dir, model=embedder_config["config"].get("embedding_model"))
+            embeddings_to_save = pipeline.ingest_objects_from_directory(experiment_config["data"], store=False, checkpoint=checkpoint)
+            print(f"Finished embedding")
+
             print(f"Saving embeddings")
             save_embeddings(embeddings_to_save, experiment_config["embeddings_dir"])
+            checkpoint.clear()
+            embeddings = embeddings_to_save
             experiment_config["embeddings_saved"] = True
             save_config_yaml(experiment_config, configs_base_dir, "experiment")
         else:
@@ -95,9 +101,14 @@ if __name__=="__main__":
             print(f"Loaded embeddings")
 
         # Save
-        print(f"Pushing to vector store")
-        vector_store.store_batch(embeddings, batch_size=10)
-        print(f"Finished pushing to vector store")
+        if sync_vector_store:
+            print(f"Syncing vector store")
+            sync_report = vector_store.sync(embeddings, batch_size=vector_store_config["config"].get("batch_size", 100))
+            print(f"Finished syncing vector store: {sync_report}")
+        else:
+            print(f"Pushing to vector store")
+            vector_store.store_batch(embeddings, batch_size=vector_store_config["config"].get("batch_size", 100))
+            print(f"Finished pushing to vector store")
         experiment_config["vector_store_exists"] = True
         save_config_yaml(experiment_config, configs_base_dir, "experiment")
     else:
@@ -108,12 +119,15 @@ if __name__=="__main__":
     query_fail = experiment_config["query_fail"]
 
     # Retrieve documents
-    query_pass_docs = retriever.retrieve(query_pass)
-    query_fail_docs = retriever.retrieve(query_fail)
+    query_pass_docs, query_fail_docs = retriever.retrieve_batch([query_pass, query_fail])
+    if hasattr(retriever, "query_cache_stats"):
+        print(f"Query embedding cache: {retriever.query_cache_stats()}")
 
     # Generate response
-    response_pass = generator.generate(query_pass, query_pass_docs)
-    response_fail = generator.generate(query_fail, query_fail_docs)
+    query_pass_embedding, query_fail_embedding = retriever.query_embeddings
+    query_pass_ids, query_fail_ids = retriever.query_doc_ids_batch
+    response_pass = generator.cached_generate(query_pass, query_pass_docs, query_pass_embedding, query_pass_ids)
+    response_fail = generator.cached_generate(query_fail, query_fail_docs, query_fail_embedding, query_fail_ids)
     
     print(f"PASS:")
     print(response_pass)
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+import tiktoken
+from openai import RateLimitError
+
+from core.embedders.AsyncOpenAIEmbedder import AsyncOpenAIEmbedder
+from experiments.benchmarks.fake_openai_server import fake_embedding, make_server
+
+
+@pytest.fixture
+def byte_tokenizer(monkeypatch):
+    # One token per byte, so batching does not need a downloaded encoding
+    encoding = tiktoken.Encoding("test", pat_str=r"\S+|\s+", mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={})
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: encoding)
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+
+
+def serve(**kwargs):
+    server = make_server(port=0, latency=0.02, retry_after=0.01, dim=8, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def embedder_for(server, **kwargs):
+    return AsyncOpenAIEmbedder(
+        api_key="fake", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        batch_size=4, base_backoff=0.01, max_backoff=0.2, **kwargs
+    )
+
+
+def test_retries_throttled_batches_and_keeps_order(byte_tokenizer):
+    server = serve(max_in_flight=2, error_rate=0.1)
+    try:
+        texts = [f"text number {i}" for i in range(200)]
+        embeddings = embedder_for(server, max_concurrency=8).embed_texts(texts)
+    finally:
+        server.shutdown()
+
+    assert server.stats["throttled"] > 0
+    assert embeddings == [pytest.approx(fake_embedding(text, 8)) for text in texts]
+
+
+def test_exhausted_retries_raise_the_api_error(byte_tokenizer):
+    server = serve(max_in_flight=1)
+    try:
+        with pytest.raises(RateLimitError):
+            embedder_for(server, max_concurrency=8, max_retries=0).embed_texts([f"text {i}" for i in range(64)])
+    finally:
+        server.shutdown()
@@ -0,0 +1,22 @@
+import threading
+
+from core.caches.EmbeddingCache import EmbeddingCache
+
+
+def test_counters_add_up_across_threads(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+    cache.put_many("model", ["cached"], [[1.0, 2.0]])
+
+    def lookups():
+        for _ in range(200):
+            assert cache.get_many("model", ["cached", "missing"]) == [[1.0, 2.0], None]
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1600, 1600, 1)
+    cache.close()
@@ -0,0 +1,35 @@
+import random
+
+import tiktoken
+
+from core.chunkers.FixedTokenSizeChunker import FixedTokenSizeChunker
+
+
+def byte_level_encoding():
+    # Small BPE without merges for multi-byte characters, so windows can end inside a character
+    ranks = {bytes([i]): i for i in range(256)}
+    for word in ["the", " the", "and", " and", "ing", "hello", " wor", "ld", "abc", "ca"]:
+        encoded = word.encode("utf-8")
+        for i in range(2, len(encoded) + 1):
+            ranks.setdefault(encoded[:i], len(ranks))
+    return tiktoken.Encoding("test", pat_str=r"""'s|'t| ?\w+| ?[^\s\w]+|\s+""", mergeable_ranks=ranks, special_tokens={})
+
+
+def test_chunks_re_encode_within_max_tokens(monkeypatch):
+    encoding = byte_level_encoding()
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+    rng = random.Random(0)
+    pieces = ["€", "日本", "the", "and", "hello", "world", "abc", "ca", "é", "ing", " ", "x"]
+    data = [
+        {"file_name": "doc.txt", "marker": i, "text": "".join(rng.choice(pieces) for _ in range(rng.randint(1, 300)))}
+        for i in range(100)
+    ]
+
+    for max_tokens, overlap in [(10, 0), (16, 4), (3, 2)]:
+        chunker = FixedTokenSizeChunker(max_tokens=max_tokens, overlap=overlap, num_workers=1)
+        chunks = chunker.chunk(data)
+        assert all(len(encoding.encode_ordinary(chunk["text"])) <= max_tokens for chunk in chunks)
+        if overlap == 0:
+            # Trimmed windows move the next one back, so nothing is dropped
+            for entry in data:
+                assert "".join(chunk["text"] for chunk in chunks if chunk["marker"] == entry["marker"]) == entry["text"]
@@ -0,0 +1,87 @@
+import pytest
+
+from core.checkpoints.IngestionCheckpoint import IngestionCheckpoint
+from core.deduplicators.MinHashDeduplicator import MinHashDeduplicator
+from core.embedders.BaseEmbedder import BaseEmbedder
+from core.embedders.OpenAIEmbedder import OpenAIEmbedder
+from core.pipelines.ParallelIngestionPipeline import ParallelIngestionPipeline
+
+
+class LineParser:
+    def cached_parse(self, file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return [
+                {"file_type": "txt", "file_name": file_path, "marker": i, "text": line.strip()}
+                for i, line in enumerate(f)
+            ]
+
+
+class OneChunkPerRecordChunker:
+    def cached_chunk(self, data):
+        return [{**record, "sub_marker": 0} for record in data]
+
+
+class Interrupted(Exception):
+    pass
+
+
+class CountingEmbedder(OpenAIEmbedder):
+    def __init__(self, fail_after=None):
+        # Skip the API client and tokenizer, only embed_data from OpenAIEmbedder is used
+        BaseEmbedder.__init__(self)
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def _embed_uncached(self, texts):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise Interrupted()
+        self.calls += 1
+        return [[float(len(text))] for text in texts]
+
+
+def write_corpus(directory):
+    # Later files repeat sentences from earlier ones, exactly and with different case and spacing
+    shared = [f"shared sentence number {i} about smoothing n-gram language models with backoff" for i in range(12)]
+    for file_index in range(8):
+        lines = [f"file {file_index} own sentence {i} on word vectors and their training objective" for i in range(6)]
+        for i, sentence in enumerate(shared):
+            if (i + file_index) % 3 == 0:
+                lines.append(sentence.upper() if file_index % 2 else "  " + sentence.replace(" ", "  "))
+        (directory / f"doc_{file_index}.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def ingest(directory, checkpoint_dir, embedder):
+    deduplicator = MinHashDeduplicator(embed_batch_size=4)
+    pipeline = ParallelIngestionPipeline(
+        {"txt": LineParser()}, OneChunkPerRecordChunker(), embedder, None, None, None,
+        num_workers=1, embed_batch_size=4, deduplicator=deduplicator
+    )
+    checkpoint = IngestionCheckpoint(str(checkpoint_dir), model="fake")
+    try:
+        return pipeline.ingest_objects_from_directory(str(directory), store=False, checkpoint=checkpoint), deduplicator.stats()
+    finally:
+        checkpoint.close()
+
+
+def summary(embedded):
+    return [
+        (item["file_name"], item["marker"], item["text"], item["embedding"],
+         sorted((location["file_name"], location["marker"]) for location in item["duplicates"]))
+        for item in embedded
+    ]
+
+
+def test_resumed_ingest_matches_uninterrupted_run(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write_corpus(corpus)
+
+    expected, expected_stats = ingest(corpus, tmp_path / "uninterrupted", CountingEmbedder())
+    assert expected_stats["exact_duplicates"] + expected_stats["near_duplicates"] > 0
+
+    with pytest.raises(Interrupted):
+        ingest(corpus, tmp_path / "resumed", CountingEmbedder(fail_after=5))
+    resumed, resumed_stats = ingest(corpus, tmp_path / "resumed", CountingEmbedder())
+
+    assert summary(resumed) == summary(expected)
+    assert resumed_stats == expected_stats
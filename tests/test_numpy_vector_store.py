@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from core.vector_stores.IVFVectorStore import IVFVectorStore
+from core.vector_stores.NumpyVectorStore import NumpyVectorStore
+
+DIM = 16
+
+
+def make_chunks(count, seed=0, file_name="doc.txt"):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "file_type": "txt", "file_name": file_name, "marker": i, "sub_marker": 0,
+            "first_10_tokens": f"chunk {i}", "text": f"chunk {i} of {file_name}",
+            "embedding": rng.normal(size=DIM).tolist()
+        }
+        for i in range(count)
+    ]
+
+
+def exact_top_k(chunks, query, k):
+    matrix = np.asarray([chunk["embedding"] for chunk in chunks], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    return [NumpyVectorStore.chunk_id(chunks[row]) for row in np.argsort(-scores)[:k]]
+
+
+def result_ids(docs):
+    return [doc["id"] for doc in docs]
+
+
+def test_flat_search_matches_exact_and_batch(tmp_path):
+    chunks = make_chunks(300)
+    store = NumpyVectorStore(embedding_dim=DIM)
+    store.store_batch(chunks, 64)
+
+    queries = np.random.default_rng(1).normal(size=(5, DIM))
+    single = [result_ids(store.query_top_k(query, 10)) for query in queries]
+    assert single == [exact_top_k(chunks, query, 10) for query in queries]
+    assert [result_ids(docs) for docs in store.query_top_k_batch(queries, 10)] == single
+
+
+def test_persisted_store_reopens_with_deletes_and_overwrites(tmp_path):
+    chunks = make_chunks(200)
+    store = NumpyVectorStore(embedding_dim=DIM, persist_directory=str(tmp_path))
+    store.store_batch(chunks, 50)
+    deleted = [store.chunk_id(chunk) for chunk in chunks[:20]]
+    store.delete(deleted)
+    # Same id with a new embedding replaces the stored row
+    replaced = {**chunks[50], "embedding": (-np.asarray(chunks[50]["embedding"])).tolist()}
+    store.store([replaced])
+
+    query = np.asarray(chunks[60]["embedding"])
+    expected = result_ids(store.query_top_k(query, 10))
+    reopened = NumpyVectorStore(embedding_dim=DIM, persist_directory=str(tmp_path))
+
+    assert result_ids(reopened.query_top_k(query, 10)) == expected
+    assert sorted(reopened.list_ids()) == sorted(store.list_ids())
+    assert not set(deleted) & set(reopened.list_ids())
+    assert reopened.query_top_k(replaced["embedding"], 1)[0]["id"] == store.chunk_id(replaced)
+
+
+def test_reopen_drops_a_torn_last_append(tmp_path):
+    chunks = make_chunks(30)
+    store = NumpyVectorStore(embedding_dim=DIM, persist_directory=str(tmp_path))
+    store.store(chunks)
+    # A crash mid-append leaves half a metadata line and part of an embedding row behind
+    with open(store.metadata_path, "a", encoding="utf-8") as f:
+        f.write('{"id": "torn", "metad')
+    with open(store.embeddings_path, "ab") as f:
+        f.write(b"\0" * (DIM * 2))
+
+    reopened = NumpyVectorStore(embedding_dim=DIM, persist_directory=str(tmp_path))
+    assert reopened.count == 30
+    assert sorted(reopened.list_ids()) == sorted(store.list_ids())
+    reopened.store(make_chunks(5, seed=2, file_name="more.txt"))
+    assert NumpyVectorStore(embedding_dim=DIM, persist_directory=str(tmp_path)).count == 35
+
+
+def test_ivf_finds_exact_neighbours_when_probing_every_list(tmp_path):
+    chunks = make_chunks(400)
+    store = IVFVectorStore(embedding_dim=DIM, nlist=8, nprobe=8, train_threshold=200, persist_directory=str(tmp_path))
+    store.store_batch(chunks, 100)
+    assert store.is_trained
+
+    queries = np.random.default_rng(3).normal(size=(5, DIM))
+    for query in queries:
+        assert result_ids(store.query_top_k(query, 10)) == exact_top_k(chunks, query, 10)
+
+    reopened = IVFVectorStore(embedding_dim=DIM, nlist=8, nprobe=2, persist_directory=str(tmp_path))
+    for query in queries:
+        assert result_ids(reopened.query_top_k(query, 10, nprobe=8)) == exact_top_k(chunks, query, 10)
+        assert result_ids(reopened.query_top_k(query, 10)) == result_ids(store.query_top_k(query, 10, nprobe=2))
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8", "pq"])
+def test_quantized_store_round_trip(tmp_path, quantization):
+    chunks = make_chunks(600)
+    config = dict(
+        embedding_dim=DIM, quantization=quantization, pq_subspaces=4,
+        quantization_train_threshold=200, rerank_k=50, persist_directory=str(tmp_path)
+    )
+    store = NumpyVectorStore(**config)
+    store.store_batch(chunks, 100)
+    assert store.quantizer.is_trained
+    assert store.memory_usage()["codes_bytes"] < store.memory_usage()["float32_bytes"]
+
+    queries = np.random.default_rng(4).normal(size=(5, DIM))
+    results = [result_ids(store.query_top_k(query, 5)) for query in queries]
+    # The shortlist is re-ranked at full precision, so the top results are exact
+    assert results == [exact_top_k(chunks, query, 5) for query in queries]
+    reopened = NumpyVectorStore(**config)
+    assert [result_ids(reopened.query_top_k(query, 5)) for query in queries] == results
+
+
+def test_int8_scale_widens_for_rows_beyond_the_training_sample():
+    store = NumpyVectorStore(embedding_dim=DIM, quantization="int8", quantization_train_threshold=50)
+    store.store(make_chunks(50))
+    # A row pointing along one axis exceeds the per-dimension range seen in training
+    spike = {**make_chunks(1, file_name="spike.txt")[0], "embedding": [0.0] * (DIM - 1) + [1.0]}
+    store.store([spike])
+
+    decoded = store.codes.astype(np.float32) * store.quantizer.scale
+    assert np.abs(decoded - store.matrix).max() <= store.quantizer.scale.max() / 2 + 1e-6
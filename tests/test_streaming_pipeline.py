@@ -0,0 +1,43 @@
+import time
+
+from core.embedders.OpenAIEmbedder import OpenAIEmbedder
+from core.embedders.BaseEmbedder import BaseEmbedder
+from core.pipelines.StreamingPipeline import StreamingPipeline
+
+
+class ListParser:
+    cache = None
+
+    def iter_parse(self, file_path):
+        for i in range(3):
+            yield {"file_type": "txt", "file_name": file_path, "marker": i, "text": f"{file_path} record {i}"}
+
+
+class OneChunkPerRecordChunker:
+    def cached_chunk(self, data):
+        return [{**record, "sub_marker": 0} for record in data]
+
+
+class SlowEmbedder(OpenAIEmbedder):
+    def __init__(self):
+        # Skip the API client and tokenizer, only embed_data from OpenAIEmbedder is under test
+        BaseEmbedder.__init__(self)
+
+    def _embed_uncached(self, texts):
+        # Long enough for both embed workers to be inside embed_data at once
+        time.sleep(0.05)
+        return [[float(len(text))] for text in texts]
+
+
+def test_two_embed_workers_write_each_chunk_once():
+    pipeline = StreamingPipeline(
+        {"txt": ListParser()}, OneChunkPerRecordChunker(), SlowEmbedder(), None, None, None,
+        num_embed_workers=2, embed_batch_size=3, report_interval=0
+    )
+    written = []
+    counters = pipeline.run(iter([f"file_{i}.txt" for i in range(4)]), sink=written.extend)
+
+    keys = [(chunk["file_name"], chunk["marker"]) for chunk in written]
+    assert len(keys) == 12
+    assert len(set(keys)) == 12
+    assert counters["stored"] == 12